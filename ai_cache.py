@@ -0,0 +1,170 @@
+"""Caches in front of the Gemini API.
+
+EmbeddingCache keeps query embeddings in an in-process LRU backed by a
+SQLite table, keyed by (model, normalized query text).
+
+SummaryCache stores generate_summary output per (case, normalized query,
+model) in SQLite with a TTL and a cap on the number of rows.
+
+Both borrow connections from the app's db.ConnectionPool rather than
+opening their own.
+"""
+import contextlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from embedding_store import decode_embedding, encode_embedding
+from migrations import migrate
+
+EMBEDDING_LOOKUP_SQL = "SELECT embedding FROM query_embeddings WHERE model=? AND query=?"
+SUMMARY_LOOKUP_SQL = (
+    "SELECT case_id, summary FROM case_summaries WHERE query=? AND model=? AND created_at > ? AND case_id IN ({placeholders})"
+)
+
+
+def normalize_query(query):
+    """Case- and whitespace-insensitive form of a search query."""
+    return " ".join(str(query).lower().split())
+
+
+class EmbeddingCache:
+    def __init__(self, pool, capacity=1024):
+        self.pool = pool
+        self.capacity = capacity
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @contextlib.contextmanager
+    def _connect(self):
+        with self.pool.connection() as conn:
+            if not self._schema_ready:
+                migrate(conn)
+                self._schema_ready = True
+            yield conn
+
+    def _remember(self, key, vector):
+        with self._lock:
+            self._lru[key] = vector
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.capacity:
+                self._lru.popitem(last=False)
+
+    def get(self, model, query):
+        key = (model, normalize_query(query))
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                return vector
+
+        with self._connect() as conn:
+            row = conn.execute(EMBEDDING_LOOKUP_SQL, key).fetchone()
+        vector = decode_embedding(row[0]) if row else None
+        with self._lock:
+            if vector is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self._remember(key, vector)
+        return vector
+
+    def put(self, model, query, vector):
+        blob = encode_embedding(vector)
+        if blob is None:
+            return None
+        key = (model, normalize_query(query))
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO query_embeddings (model, query, embedding) VALUES (?,?,?)", (*key, blob))
+            conn.commit()
+        vector = decode_embedding(blob)
+        self._remember(key, vector)
+        return vector
+
+    def get_or_compute(self, model, query, compute):
+        """Returns the cached vector, or calls compute(normalized_query) and stores the result."""
+        vector = self.get(model, query)
+        if vector is None:
+            computed = compute(normalize_query(query))
+            vector = self.put(model, query, computed)
+            if vector is None:
+                vector = np.asarray(computed, dtype=np.float32)
+        return vector
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._lru),
+            }
+
+
+class SummaryCache:
+    def __init__(self, pool, ttl=7 * 24 * 3600, max_entries=50000, evict_every=100):
+        self.pool = pool
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+
+    @contextlib.contextmanager
+    def _connect(self):
+        with self.pool.connection() as conn:
+            if not self._schema_ready:
+                migrate(conn)
+                self._schema_ready = True
+            yield conn
+
+    def get_many(self, case_ids, query, model):
+        """Returns {case_id: summary} for the ids that have a fresh cached summary."""
+        if not case_ids:
+            return {}
+        placeholders = ",".join("?" * len(case_ids))
+        with self._connect() as conn:
+            rows = conn.execute(
+                SUMMARY_LOOKUP_SQL.format(placeholders=placeholders),
+                (normalize_query(query), model, time.time() - self.ttl, *case_ids),
+            ).fetchall()
+        found = {case_id: summary for case_id, summary in rows}
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(set(case_ids)) - len(found)
+        return found
+
+    def put(self, case_id, query, model, summary):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO case_summaries (case_id, query, model, summary, created_at) VALUES (?,?,?,?,?)",
+                (case_id, normalize_query(query), model, summary, time.time()),
+            )
+            conn.commit()
+            with self._lock:
+                self._puts += 1
+                evict = self._puts % self.evict_every == 0
+            if evict:
+                self._evict(conn)
+
+    def _evict(self, conn):
+        conn.execute("DELETE FROM case_summaries WHERE created_at <= ?", (time.time() - self.ttl,))
+        conn.execute(
+            "DELETE FROM case_summaries WHERE rowid IN (SELECT rowid FROM case_summaries ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        conn.commit()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
@@ -2,17 +2,28 @@ import os
 from flask import Flask, render_template, request, jsonify, session, send_from_directory
 from flask_session import Session
 from dotenv import load_dotenv 
-import pandas as pd
 import secrets
-import sqlite3
 import bcrypt
 from datetime import datetime
-import google.generativeai as genai
 import numpy as np
-import json
 import concurrent.futures
-import requests
+import asyncio
 import random
+from ai_cache import EmbeddingCache, SummaryCache
+from db import ConnectionPool
+from case_index import CaseIndex
+from retrieval import make_engine
+from passages import PassageIndex
+from ingest import ingest_csv
+from migrations import migrate
+from lawyer_store import lawyers_for_practice_area, load_lawyers_csv
+from lawyer_index import LawyerIndex
+from practice_areas import PracticeAreaClassifier
+from queries import (ALL_HISTORY_SQL, CASE_SNIPPET_SQL, DOC_VIEW_SQL, LOGIN_SQL, PAGE_ROWS_SQL, RECENT_HISTORY_SQL,
+                     RECORD_HISTORY_SQL)
+from lexical_index import is_identifier_query, lexical_search, reciprocal_rank_fusion
+from gemini_pool import GeminiPool
+from news_cache import NewsCache, NewsClient
 
 load_dotenv()
 
@@ -22,64 +33,80 @@ app.config["SESSION_TYPE"] = "filesystem"
 app.secret_key = secrets.token_hex(32)
 Session(app)
 
-api_keys = [os.getenv("GEMINI_API_KEY1"),os.getenv("GEMINI_API_KEY2"),os.getenv("GEMINI_API_KEY3")]
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 
-n_apis = len(api_keys)
-genai.configure(api_key=api_keys[0])
-if not api_keys[0] or not api_keys[1] or not api_keys[2]:
-    print("WARNING: GEMINI_API_KEY1 or GEMINI_API_KEY2 not found in .env file. AI features will fail.")
+# One client per GEMINI_API_KEY1..N with per-key rate limiting and retries.
+gemini = GeminiPool.from_env()
 
 MODEL_NAME = "gemini-flash-latest"
 EMBEDDING_MODEL = "models/text-embedding-004"
+RESULTS_PER_PAGE = 10
+LAWYERS_PER_PAGE = 12
+# Each ranking is cut at this fixed depth before fusion, so every page of a
+# query slices the same fused list and results never shift between pages.
+# Pages past the fused head continue in exact cosine order (see hybrid_tail).
+HYBRID_DEPTH = 300
+PROGRESSIVE_SUMMARIES = os.getenv("PROGRESSIVE_SUMMARIES", "1") == "1"
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", 16))
 
-def get_db_connection():
-    conn = sqlite3.connect('users.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+# One bounded pool for every blocking Gemini call in the process, shared by all
+# requests, so the total number of in-flight AI calls never exceeds AI_MAX_CONCURRENCY.
+ai_executor = concurrent.futures.ThreadPoolExecutor(max_workers=AI_MAX_CONCURRENCY, thread_name_prefix="ai")
 
-def get_embedding(text):
-    try:
-        if not text or not isinstance(text, str):
-            return []
-            
-        result = genai.embed_content(
-            model=EMBEDDING_MODEL,
-            content=text,
-            task_type="RETRIEVAL_DOCUMENT"
-        )
-        return result['embedding']
-    except Exception as e:
-        print(f"Embedding Error: {e}")
-        return []
+db_pool = ConnectionPool("users.db")
+case_index = CaseIndex(make_engine(db_path="users.db"))
+passage_index = PassageIndex(pooling=os.getenv("PASSAGE_POOLING", "max"))
+query_embedding_cache = EmbeddingCache(db_pool)
+lawyer_index = LawyerIndex()
+news_cache = NewsCache(NewsClient(NEWS_API_KEY).fetch, ttl=int(os.getenv("NEWS_CACHE_TTL", 15 * 60)))
+practice_classifier = PracticeAreaClassifier.from_csv(
+    "lawyers.csv", min_confidence=float(os.getenv("PRACTICE_AREA_MIN_CONFIDENCE", 0.6))
+)
+summary_cache = SummaryCache(db_pool, ttl=int(os.getenv("SUMMARY_CACHE_TTL", 7 * 24 * 3600)))
+
+async def run_ai(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(ai_executor, fn, *args)
+
+def embed_query(text):
+    return gemini.embed(EMBEDDING_MODEL, [text], "RETRIEVAL_QUERY")[0]
 
-def generate_summary(text, query, api_key):
+def get_query_embedding(query):
+    return query_embedding_cache.get_or_compute(EMBEDDING_MODEL, query, embed_query)
+
+def generate_summary(text, query):
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(MODEL_NAME)
         prompt = f"""
         You are a legal assistant. Summarize the following legal case snippet in 2 sentences, 
         focusing specifically on what the case is about: "{query}".
         
         Case Text: "{text}"
         """
-        response = model.generate_content(prompt)
-        return response.text
+        return gemini.generate(MODEL_NAME, prompt)
     except Exception as e:
         print(f"Summary Error: {e}")
         return text
 
-def get_practice_area_keywords(query, api_key):
+def summarize_case(row, query):
+    summary = generate_summary(row['snippet'], query)
+    # generate_summary falls back to the raw snippet on error; don't cache that.
+    if summary != row['snippet']:
+        summary_cache.put(row['id'], query, MODEL_NAME, summary)
+    return summary
+
+def case_result(row, snippet, summary_pending=False):
+    return {"id": row['id'],"case_id": row['case_id'],"case_title": row['case_title'],"title": row['case_title'],"citation": row['citation'],"judgement_date": row['judgement_date'],"snippet": snippet,"summary_pending": summary_pending}
+
+def get_practice_area_keywords(query):
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(MODEL_NAME)
         prompt = f"""
         Extract the main legal practice area from this query: "{query}". 
         Return ONLY the single word or short phrase (e.g., "Divorce", "Criminal", "Property", "Corporate", "Cheque Bounce").
         If no specific area matches, return "General".
         """
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        practice_area = gemini.generate(MODEL_NAME, prompt).strip()
+        practice_classifier.remember(query, practice_area)
+        return practice_area
     except Exception as e:
         print(f"Practice Area Extraction Error: {e}")
         return "General"
@@ -90,144 +117,174 @@ def index():
     name = session.get("name")
     past_queries = []
     if session.get("login_status"):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''SELECT query FROM history WHERE email=? ORDER BY created_at DESC LIMIT 5''',(email,))
-        past_queries = [row for row in cursor.fetchall()]
-        conn.close()
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(RECENT_HISTORY_SQL, (email,))
+            past_queries = [row for row in cursor.fetchall()]
     return render_template("index.html", login_status=session.get("login_status", False), name=name, email=email, past_queries=past_queries)
 
 @app.route('/news')
 def news():
     topic = request.args.get('topic','legal')
-    indian_sources = 'livelaw.in,barandbench.com,timesofindia.indiatimes.com,thehindu.com,hindustantimes.com,indianexpress.com,ndtv.com,indiatoday.in,theprint.in'
-    url = f"https://newsapi.org/v2/everything"
-    params = {'q': topic, 'domains': indian_sources, 'searchIn': 'title,description','apiKey': NEWS_API_KEY,'language': 'en','sortBy': 'relevancy','pageSize': 100}
-    
-    articles = []
-    try:
-        response = requests.get(url, params=params)
-        data = response.json()
-        if data.get('status') == 'ok':
-            articles = data.get('articles', [])
-            articles.sort(key=lambda x: x['publishedAt'], reverse=True)
-    except:
-        articles = []
-
+    articles, _ = news_cache.get(topic)
     return render_template('news.html', articles=articles, topic=topic,login_status=session.get("login_status", False), name=session.get("name"))
 
+
+def hybrid_tail(q_vec, fused, start, stop, k=60):
+    """Results start..stop-1 after the fused head: the cosine ranking past HYBRID_DEPTH, minus ids already fused.
+
+    Every case the cosine ranking puts before HYBRID_DEPTH is in the fused
+    head already, so the tail starts there. A fused id can turn up again further down, so the
+    window is widened by len(fused) to still fill the slice once they are
+    dropped. Scores continue the RRF scale (1 / (k + rank + 1)), which keeps
+    them below every fused score.
+    """
+    start = max(start, 0)
+    head = {case_id for _, case_id in fused}
+    ids, _ = case_index.search_window(q_vec, HYBRID_DEPTH, HYBRID_DEPTH + stop + len(fused))
+    tail = [(1.0 / (k + HYBRID_DEPTH + rank + 1), int(case_id))
+            for rank, case_id in enumerate(ids) if int(case_id) not in head]
+    return tail[start:stop]
+
+
 @app.route('/search_query/<int:page_num>', methods=["GET", "POST"])
-def search_query(page_num):
+async def search_query(page_num):
     if request.method == "GET":
         query = request.args.get("query",'')
         past_queries = []
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        if session.get("login_status"):
-            email = session["email"]
-            cursor.execute('''SELECT id, query FROM history WHERE email=? AND query=?''', (email,query))
-            top_query = cursor.fetchone()
-            if top_query and top_query['query'] == query:
-                cursor.execute("UPDATE history SET created_at = CURRENT_TIMESTAMP WHERE id = ?", (top_query['id'],))
-            else:
-                cursor.execute('''INSERT INTO history (email, query) VALUES (?, ?)''', (email, query))
-            conn.commit()
-            cursor.execute('''SELECT query FROM history WHERE email=? ORDER BY created_at DESC LIMIT 5''', (email,))
-            past_queries = [row for row in cursor.fetchall()]
-        suggested_lawyers = []
-        try:
-            practice_area = get_practice_area_keywords(query, api_keys[0])
-            print(f"Extracted Practice Area: {practice_area}")
-            search_term = practice_area if practice_area != "General" else ""
+        # The connection goes back to the pool before the Gemini calls below.
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            if session.get("login_status"):
+                email = session["email"]
+                cursor.execute(RECORD_HISTORY_SQL, (email, query))
+                conn.commit()
+                cursor.execute(RECENT_HISTORY_SQL, (email,))
+                past_queries = [row for row in cursor.fetchall()]
+            start = (page_num-1)*RESULTS_PER_PAGE
+            stop = start+RESULTS_PER_PAGE
+            # Citation / case-number lookups are answered from the FTS index alone.
+            lexical_hits, lexical_total = [], 0
+            if is_identifier_query(query):
+                lexical_hits, lexical_total = lexical_search(conn, query, start, stop, phrase=True)
+
+        # The practice area usually comes from the local classifier; only queries it
+        # can't place go to Gemini, concurrently with the query embedding.
+        practice_area = practice_classifier.label(query)
+        ai_calls = {}
+        if practice_area is None:
+            ai_calls["practice_area"] = run_ai(get_practice_area_keywords, query)
+        if not lexical_total:
+            ai_calls["q_vec"] = run_ai(get_query_embedding, query)
+        ai_results = dict(zip(ai_calls, await asyncio.gather(*ai_calls.values(), return_exceptions=True)))
+        practice_area = ai_results.get("practice_area", practice_area)
+        q_vec = ai_results.get("q_vec")
+
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            suggested_lawyers = []
+            try:
+                if isinstance(practice_area, Exception):
+                    raise practice_area
+                print(f"Extracted Practice Area: {practice_area}")
+                search_term = practice_area if practice_area != "General" else ""
             
-            cursor.execute("SELECT * FROM lawyers WHERE specialization LIKE ? ORDER BY rating DESC LIMIT 10", (f'%{search_term}%',))
-            top_matches = cursor.fetchall()
+                top_matches = lawyers_for_practice_area(conn, search_term)
             
-            if len(top_matches) > 3:
-                suggested_lawyers = random.sample(top_matches, 3)
-            else:
-                suggested_lawyers = top_matches
+                if len(top_matches) > 3:
+                    suggested_lawyers = random.sample(top_matches, 3)
+                else:
+                    suggested_lawyers = top_matches
                 
-        except Exception as e:
-            print(f"Lawyer Suggestion Error: {e}")
+            except Exception as e:
+                print(f"Lawyer Suggestion Error: {e}")
+
+            try:
+                if lexical_total:
+                    page_hits = lexical_hits
+                    total_results = lexical_total
+                else:
+                    if isinstance(q_vec, Exception):
+                        raise q_vec
+
+                    # Fuse the cosine, BM25 and passage rankings, each cut at HYBRID_DEPTH.
+                    case_index.refresh(conn)
+                    passage_index.refresh(conn)
+                    vector_ids, _ = case_index.search_window(q_vec, 0, HYBRID_DEPTH)
+                    bm25_hits, _ = lexical_search(conn, query, 0, HYBRID_DEPTH)
+                    rankings = [[int(i) for i in vector_ids], [case_id for _, case_id in bm25_hits]]
+                    if len(passage_index):
+                        rankings.append(passage_index.rank_cases(q_vec, HYBRID_DEPTH))
+                    fused = reciprocal_rank_fusion(rankings)
+                    page_hits = fused[start:stop]
+                    if stop > len(fused):
+                        page_hits += hybrid_tail(q_vec, fused, start - len(fused), stop - len(fused))
+                    # Every embedded case is reachable, so the page count follows the corpus, not the fused head.
+                    total_results = max(len(case_index), len(fused))
+
+            except Exception as e:
+                print(f"Search Error: {e}")
+                page_hits = []
+                total_results = 0
+            page_nums = (page_num,int(np.ceil(total_results/RESULTS_PER_PAGE)))
+
+            ai_batch = []
+            if page_hits:
+                placeholders = ",".join("?" * len(page_hits))
+                cursor.execute(PAGE_ROWS_SQL.format(placeholders=placeholders), [case_id for _, case_id in page_hits])
+                rows_by_id = {row['id']: row for row in cursor.fetchall()}
+                ai_batch = [(score, rows_by_id[case_id]) for score, case_id in page_hits if case_id in rows_by_id]
 
-        try:
-            query_res = genai.embed_content(
-                model=EMBEDDING_MODEL,
-                content=query,
-                task_type="RETRIEVAL_QUERY"
-            )
-            q_vec = np.array(query_res['embedding'])
-            
-            cursor.execute("SELECT id, case_title, citation, judgement_date, snippet, case_id, embedding FROM cases")
-            rows = cursor.fetchall()
-            
-            valid_rows = []
-            valid_embeddings = []
-            
-            for r in rows:
-                if r['embedding']:
-                    try:
-                        vec = json.loads(r['embedding'])
-                        valid_embeddings.append(vec)
-                        valid_rows.append(r)
-                    except:
-                        continue
-            
-            if not valid_embeddings:
-                top_results = []
-            else:
-                doc_matrix = np.array(valid_embeddings)
-                norms = np.linalg.norm(doc_matrix, axis=1) * np.linalg.norm(q_vec)
-                norms[norms == 0] = 1 
-                scores = np.dot(doc_matrix, q_vec) / norms
-                results = list(zip(scores, valid_rows))
-                results.sort(key=lambda x: x[0], reverse=True)
-                top_results = results
-                print(len(top_results))
-
-        except Exception as e:
-            print(f"Search Error: {e}")
-            top_results = []
-        page_nums = (page_num,int(np.ceil(len(top_results)/10)))
-        ai_batch = top_results[(page_num-1)*10:page_num*10]
-        
         ai_results_fixed = [None] * len(ai_batch)
 
-        def process_ai_item(data, api_key):
-            index, item = data
-            score, row = item
-            summary = generate_summary(row['snippet'], query, api_key)
-            return index, {"id": row['id'],"case_id": row['case_id'],"case_title": row['case_title'],"title": row['case_title'],"citation": row['citation'],"judgement_date": row['judgement_date'],"snippet": summary}
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_idx = {
-                executor.submit(process_ai_item, (i, item, api_keys[i%n_apis])): i 
-                for i, item in enumerate(ai_batch)
-            }
-            
-            for future in concurrent.futures.as_completed(future_to_idx):
-                try:
-                    idx, result = future.result()
-                    ai_results_fixed[idx] = result
-                except Exception as e:
-                    original_idx = future_to_idx[future]
-                    orig_row = ai_batch[original_idx][1]
-                    ai_results_fixed[original_idx] = {
-                        "id": orig_row['id'],"case_id": orig_row['case_id'],"case_title": orig_row['case_title'],"title": orig_row['case_title'],"citation": orig_row['citation'],"judgement_date": orig_row['judgement_date'],"snippet": orig_row['snippet']
-                    }
+        cached_summaries = summary_cache.get_many([row['id'] for _, row in ai_batch], query, MODEL_NAME)
+        pending = []
+        for i, (score, row) in enumerate(ai_batch):
+            if row['id'] in cached_summaries:
+                ai_results_fixed[i] = case_result(row, cached_summaries[row['id']])
+            elif PROGRESSIVE_SUMMARIES:
+                # Render the raw snippet now; main.js fetches the summary from /case_summary.
+                ai_results_fixed[i] = case_result(row, row['snippet'], summary_pending=True)
+            else:
+                pending.append((i, (score, row)))
+
+        if pending:
+            summaries = await asyncio.gather(
+                *(run_ai(summarize_case, row, query) for i, (score, row) in pending),
+                return_exceptions=True,
+            )
+            for (i, (score, row)), summary in zip(pending, summaries):
+                if isinstance(summary, Exception):
+                    print(f"Summary Error: {summary}")
+                    summary = row['snippet']
+                ai_results_fixed[i] = case_result(row, summary)
 
         final_cases = [x for x in ai_results_fixed if x is not None]
-        conn.close()
         return render_template('search-result.html', query=query, cases=final_cases, past_queries=past_queries, page_nums=page_nums, login_status=session.get("login_status", False), name=session.get("name"), suggested_lawyers=suggested_lawyers)
 
+@app.route('/case_summary/<int:case_id>')
+async def case_summary(case_id):
+    query = request.args.get("query", '')
+    cached = summary_cache.get_many([case_id], query, MODEL_NAME)
+    if case_id in cached:
+        return jsonify({"id": case_id, "summary": cached[case_id]})
+
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(CASE_SNIPPET_SQL, (case_id,))
+        row = cursor.fetchone()
+    if not row:
+        return jsonify({"error": "Case not found"}), 404
+    summary = await run_ai(summarize_case, row, query)
+    return jsonify({"id": case_id, "summary": summary})
+
 @app.route('/doc_view/<id>')
 def doc_view(id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT case_id, case_title, citation, judgement_date, judges, pdf_path FROM cases WHERE id = ?', (id,))
-    case_data = cursor.fetchone()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(DOC_VIEW_SQL, (id,))
+        case_data = cursor.fetchone()
     if not case_data:
         return "Document not found", 404
     
@@ -247,11 +304,10 @@ def doc_view(id):
 @app.route('/login', methods=["POST"])
 def login():
     data = request.get_json()
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT name, pwd FROM users WHERE email=?', (data.get("email"),))
-    user = cursor.fetchone()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(LOGIN_SQL, (data.get("email"),))
+        user = cursor.fetchone()
     if user and bcrypt.checkpw(data.get("pwd").encode('utf-8'), user['pwd'].encode('utf-8')):
         session["login_status"] = True
         session["email"] = data.get("email")
@@ -263,16 +319,15 @@ def login():
 def register():
     data = request.get_json()
     hashed = bcrypt.hashpw(data.get("pwd").encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute('INSERT INTO users (email,name,pwd,dob) VALUES(?,?,?,?)', 
-                       (data.get("email"), data.get("name"), hashed, data.get("dob")))
-        conn.commit()
-        res = 1
-    except:
-        res = 0
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute('INSERT INTO users (email,name,pwd,dob) VALUES(?,?,?,?)', 
+                           (data.get("email"), data.get("name"), hashed, data.get("dob")))
+            conn.commit()
+            res = 1
+        except:
+            res = 0
     return jsonify({"registration": res})
 
 @app.route('/logout', methods=["POST"])
@@ -284,38 +339,45 @@ def logout():
 def serve_pdf(filename):
     return send_from_directory('static/pdfs', filename)
 
+def get_lawyer_index():
+    # Another process may have reloaded lawyers.csv (e.g. a shadow swap); data_loads shows it.
+    with db_pool.connection() as conn:
+        lawyer_index.refresh_if_reloaded(conn)
+    return lawyer_index
+
 @app.route('/lawyers')
 def lawyers():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     query = request.args.get('query', '').strip()
     city = request.args.get('city', '').strip()
-    
-    sql = "SELECT * FROM lawyers WHERE 1=1"
-    params = []
-    
-    if query:
-        sql += " AND (name LIKE ? OR specialization LIKE ?)"
-        params.extend([f'%{query}%', f'%{query}%'])
-    if city:
-        sql += " AND city LIKE ?"
-        params.append(f'%{city}%')
-        
-    cursor.execute(sql, params)
-    lawyers_data = cursor.fetchall()
-    conn.close()
-    
-    return render_template("lawyers.html", lawyers=lawyers_data, query=query, city=city, 
+    area = request.args.get('area', '').strip()
+    page = request.args.get('page', 1, type=int)
+
+    result = get_lawyer_index().search(query, city, page, LAWYERS_PER_PAGE, area=area)
+    return render_template("lawyers.html", lawyers=result["lawyers"], query=query, city=city, area=area,
+                           total=result["total"], page_nums=(result["page"], result["pages"]), facets=result["facets"],
                            login_status=session.get("login_status", False), name=session.get("name"))
 
+@app.route('/lawyers/autocomplete')
+def lawyers_autocomplete():
+    prefix = request.args.get('q', '')
+    limit = min(request.args.get('limit', 8, type=int), 50)
+    return jsonify({"query": prefix, "suggestions": get_lawyer_index().autocomplete(prefix, limit)})
+
+@app.route('/cache_stats')
+def cache_stats():
+    return jsonify({"query_embeddings": query_embedding_cache.stats(), "summaries": summary_cache.stats(),
+                    "practice_areas": practice_classifier.stats(), "db_pool": db_pool.stats(), "news": news_cache.stats()})
+
+@app.route('/gemini_metrics')
+def gemini_metrics():
+    return jsonify(gemini.metrics())
+
 @app.route('/history', methods=['GET'])
 def history():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''SELECT query, created_at FROM history WHERE email=? ORDER BY created_at DESC''', (session.get("email"),))
-    rows = cursor.fetchall()
-    conn.close()
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(ALL_HISTORY_SQL, (session.get("email"),))
+        rows = cursor.fetchall()
 
     past_queries = []
     for query, created_at in rows:
@@ -329,76 +391,20 @@ def history():
     return render_template("history.html", past_queries=past_queries, name=session.get("name", None), email=session.get("email", None))
 
 if __name__ == '__main__':
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''CREATE TABLE IF NOT EXISTS users (email TEXT PRIMARY KEY, name TEXT NOT NULL, pwd TEXT NOT NULL, dob TEXT)''')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS cases (
-        id INTEGER PRIMARY KEY AUTOINCREMENT, 
-        case_title TEXT NOT NULL, 
-        citation TEXT, 
-        judges TEXT, 
-        judgement_date TEXT, 
-        case_id TEXT, 
-        bench TEXT, 
-        pdf_path TEXT, 
-        snippet TEXT,
-        embedding TEXT
-    )''')
-
-    cursor.execute('''CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT NOT NULL, query TEXT NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP)''')
-    
-    cursor.execute('DROP TABLE IF EXISTS lawyers')
-    cursor.execute('''CREATE TABLE IF NOT EXISTS lawyers (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT,
-        url TEXT,
-        image_url TEXT,
-        city TEXT,
-        state TEXT,
-        address TEXT,
-        specialization TEXT,
-        experience TEXT,
-        rating TEXT
-    )''')
-    conn.commit()
-    
-    cursor.execute('SELECT count(*) FROM cases')
-    count = cursor.fetchone()[0]
-    
-    if count == 0 and os.path.exists("merged_scraped_data.csv"):
-        print("--- FIRST RUN DETECTED ---")
-        print("Reading CSV and generating AI Embeddings. This will take a few minutes...")
-        
-        df = pd.read_csv("merged_scraped_data.csv")
-        records = df.to_dict(orient='records')
-        
-        for i, row in enumerate(records):
-            if i % 5 == 0:
-                print(f"Processing record {i+1}/{len(records)}...")
-            content_to_embed = f"{row.get('title', '')} {row.get('snippet', '')}"
-            vector = get_embedding(content_to_embed)
-            vector_json = json.dumps(vector) 
-            
-            cursor.execute('''INSERT INTO cases (case_title, citation, judges, judgement_date, case_id, bench, pdf_path, snippet, embedding)
-                           VALUES (?,?,?,?,?,?,?,?,?)''', 
-                           (row.get("title"), row.get("citation"), row.get("coram"), row.get("decision_date"), 
-                            row.get("case_no"), row.get("bench"), row.get("pdf_path_or_url"), 
-                            row.get("snippet"), vector_json))
-        conn.commit()
-        print("--- DATABASE INITIALIZED SUCCESSFULLY ---")
-
-    print("Loading lawyers from CSV...")
-    if os.path.exists("lawyers.csv"):
-        l_df = pd.read_csv("lawyers.csv")
-        l_df = l_df.where(pd.notnull(l_df), None)
-        l_records = l_df.to_dict(orient='records')
-        for row in l_records:
-            cursor.execute('''INSERT INTO lawyers (name, url, image_url, city, state, address, specialization, experience, rating)
-                           VALUES (?,?,?,?,?,?,?,?,?)''',
-                           (row.get("name"), row.get("url"), row.get("image_url"), row.get("city"), 
-                            row.get("state"), row.get("address"), row.get("specialization"), 
-                            row.get("experience"), row.get("rating")))
-        conn.commit()
-
-    conn.close()
+    with db_pool.connection() as conn:
+        for version in migrate(conn):
+            print(f"Applied schema migration {version}")
+
+        if os.path.exists("merged_scraped_data.csv"):
+            print("Embedding new cases from merged_scraped_data.csv (already ingested rows are skipped)...")
+            ingest_csv("merged_scraped_data.csv", "users.db", gemini)
+
+        print(f"Loaded {case_index.refresh(conn)} case embeddings into the search index.")
+        print(f"Loaded {passage_index.refresh(conn)} passage embeddings (run passages.py to index full PDF text).")
+
+        if os.path.exists("lawyers.csv"):
+            stats = load_lawyers_csv(conn, "lawyers.csv", shadow=os.getenv("LAWYERS_SHADOW_RELOAD") == "1")
+            print("lawyers.csv unchanged since the last load." if stats["skipped"] else f"Loaded lawyers.csv: {stats}")
+        lawyer_index.refresh(conn)
+
     app.run(debug=True)
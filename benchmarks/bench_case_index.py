@@ -0,0 +1,93 @@
+"""Per-query ranking cost: legacy JSON scan vs. the in-memory CaseIndex.
+
+Run from the project root:  python -m benchmarks.bench_case_index
+"""
+import argparse
+import json
+import sqlite3
+import time
+
+import numpy as np
+
+from case_index import CaseIndex
+
+
+def build_db(n, dim, rng):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE cases (id INTEGER PRIMARY KEY AUTOINCREMENT, snippet TEXT, embedding TEXT)")
+    for start in range(0, n, 5000):
+        block = rng.standard_normal((min(5000, n - start), dim)).astype(np.float32)
+        conn.executemany(
+            "INSERT INTO cases (snippet, embedding) VALUES (?, ?)",
+            ((f"case {start + i}", json.dumps(vec.tolist())) for i, vec in enumerate(block)),
+        )
+    conn.commit()
+    return conn
+
+
+def legacy_query(conn, q_vec):
+    # Mirrors the original search_query: read, parse, stack, normalize, sort.
+    rows = conn.execute("SELECT id, snippet, embedding FROM cases").fetchall()
+    doc_matrix = np.array([json.loads(r[2]) for r in rows])
+    norms = np.linalg.norm(doc_matrix, axis=1) * np.linalg.norm(q_vec)
+    norms[norms == 0] = 1
+    scores = np.dot(doc_matrix, q_vec) / norms
+    results = list(zip(scores, rows))
+    results.sort(key=lambda x: x[0], reverse=True)
+    return results
+
+
+def index_full_sort(index, q_vec):
+    ids, scores = index.engine.score_all(q_vec / np.linalg.norm(q_vec))
+    return ids[np.argsort(-scores, kind="stable")][:10]
+
+
+def index_page(index, q_vec, page):
+    start = (page - 1) * 10
+    return index.search_window(q_vec, start, start + 10)
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--legacy-max", type=int, default=10_000,
+                        help="skip the legacy path above this many cases (it parses every row per query)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'cases':>8} {'load (s)':>10} {'full sort (ms)':>15} {'page 1 (ms)':>12} "
+          f"{'last page (ms)':>15} {'legacy (ms)':>12}")
+    for n in args.sizes:
+        conn = build_db(n, args.dim, rng)
+        q_vec = rng.standard_normal(args.dim)
+
+        index = CaseIndex()
+        start = time.perf_counter()
+        index.refresh(conn)
+        load_s = time.perf_counter() - start
+
+        sort_ms = timed(lambda: index_full_sort(index, q_vec), args.repeat) * 1000
+        first_ms = timed(lambda: index_page(index, q_vec, 1), args.repeat) * 1000
+        last_page = -(-n // 10)
+        last_ms = timed(lambda: index_page(index, q_vec, last_page), args.repeat) * 1000
+        if n <= args.legacy_max:
+            legacy_ms = f"{timed(lambda: legacy_query(conn, q_vec), max(1, args.repeat // 2)) * 1000:.2f}"
+        else:
+            legacy_ms = "skipped"
+        print(f"{n:>8} {load_s:>10.2f} {sort_ms:>15.2f} {first_ms:>12.2f} {last_ms:>15.2f} {legacy_ms:>12}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
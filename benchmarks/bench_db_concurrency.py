@@ -0,0 +1,129 @@
+"""Many simultaneous searches against users.db: per-request connections vs. db.ConnectionPool.
+
+Each simulated search does what search_query does against SQLite: bump the
+user's history row, read the last five queries, wait on a (simulated)
+remote call, then read a page of cases. The "legacy" mode opens a fresh
+connection per search with the default rollback journal and holds it across
+the remote wait. The "pooled" mode uses WAL via ConnectionPool and releases
+the connection before waiting.
+
+Run from the project root:  python -m benchmarks.bench_db_concurrency
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from db import ConnectionPool
+
+
+def build_db(path, n_cases, n_users):
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE cases (id INTEGER PRIMARY KEY AUTOINCREMENT, case_title TEXT, citation TEXT, judgement_date TEXT, snippet TEXT, case_id TEXT);
+        CREATE TABLE history (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT NOT NULL, query TEXT NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+    ''')
+    conn.executemany(
+        "INSERT INTO cases (case_title, citation, judgement_date, snippet, case_id) VALUES (?,?,?,?,?)",
+        ((f"Case {i}", f"[2025] {i} S.C.R.", "2025-01-01", "lorem ipsum " * 40, f"CA {i}") for i in range(n_cases)),
+    )
+    conn.executemany(
+        "INSERT INTO history (email, query) VALUES (?, ?)",
+        ((f"user{i % n_users}@example.com", f"query {i}") for i in range(n_users * 20)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def legacy_connection(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def search(conn_factory, rng, n_cases, n_users, remote_wait, release_before_remote, latencies, errors):
+    email = f"user{rng.randrange(n_users)}@example.com"
+    query = f"query {rng.randrange(50)}"
+    start = time.perf_counter()
+    try:
+        conn = conn_factory()
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, query FROM history WHERE email=? AND query=?", (email, query))
+        row = cursor.fetchone()
+        if row:
+            cursor.execute("UPDATE history SET created_at = CURRENT_TIMESTAMP WHERE id = ?", (row[0],))
+        else:
+            cursor.execute("INSERT INTO history (email, query) VALUES (?, ?)", (email, query))
+        conn.commit()
+        cursor.execute("SELECT query FROM history WHERE email=? ORDER BY created_at DESC LIMIT 5", (email,))
+        cursor.fetchall()
+        if release_before_remote:
+            conn.close()
+        time.sleep(remote_wait)
+        if release_before_remote:
+            conn = conn_factory()
+            cursor = conn.cursor()
+        ids = rng.sample(range(1, n_cases + 1), 10)
+        cursor.execute(f"SELECT id, case_title, snippet FROM cases WHERE id IN ({','.join('?' * len(ids))})", ids)
+        cursor.fetchall()
+        conn.close()
+    except sqlite3.OperationalError as e:
+        errors.append(str(e))
+        return
+    latencies.append(time.perf_counter() - start - remote_wait)
+
+
+def run(label, conn_factory, release_before_remote, args):
+    latencies = []
+    errors = []
+    per_thread = args.searches // args.threads
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(per_thread):
+            search(conn_factory, rng, args.cases, args.users, args.remote_ms / 1000, release_before_remote, latencies, errors)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+    median = statistics.median(latencies) if latencies else 0.0
+    print(f"{label:>8} | {len(latencies) / elapsed:>10.0f} | {median * 1000:>11.2f} | {p95 * 1000:>11.2f} | {len(errors):>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--searches", type=int, default=3200)
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--remote-ms", type=float, default=5.0, help="simulated Gemini wait per search")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        pooled_path = os.path.join(tmp, "pooled.db")
+        build_db(legacy_path, args.cases, args.users)
+        build_db(pooled_path, args.cases, args.users)
+
+        print(f"{args.threads} threads, {args.searches} searches, {args.remote_ms:g} ms simulated remote wait")
+        print(f"{'mode':>8} | {'searches/s':>10} | {'p50 db (ms)':>11} | {'p95 db (ms)':>11} | {'errors':>6}")
+        run("legacy", lambda: legacy_connection(legacy_path), False, args)
+        pool = ConnectionPool(pooled_path, size=8)
+        run("pooled", pool.acquire, True, args)
+        print(f"pool: {pool.stats()}")
+        pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
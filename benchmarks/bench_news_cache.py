@@ -0,0 +1,97 @@
+"""/news latency with and without NewsCache, against a local newsapi.org stub.
+
+The stub serves /v2/everything with a configurable delay and can be
+switched to fail, so the script also shows stale copies being served
+while upstream is slow or down. No API key or network access is needed.
+
+Run from the project root:  python -m benchmarks.bench_news_cache
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from news_cache import NewsCache, NewsClient
+
+
+class Upstream:
+    delay = 0.2
+    fail = False
+    calls = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        Upstream.calls += 1
+        time.sleep(Upstream.delay)
+        if Upstream.fail:
+            self.send_response(503)
+            self.end_headers()
+            return
+        articles = [{"source": {"id": None, "name": "Stub"}, "author": None, "title": f"Article {i}", "description": "",
+                     "url": f"http://stub/{i}", "urlToImage": None, "publishedAt": f"2025-11-{1 + i % 28:02d}T00:00:00Z",
+                     "content": ""} for i in range(100)]
+        body = json.dumps({"status": "ok", "totalResults": len(articles), "articles": articles}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delay-ms", type=float, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Upstream.delay = args.delay_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = NewsClient("stub-key", base_url=f"http://127.0.0.1:{server.server_port}/v2", timeout=(1, 1))
+    cache = NewsCache(client.fetch, ttl=0.5, stale_ttl=3600, wait_timeout=1.0, refresh_every=3600)
+
+    print(f"stub upstream delay {args.delay_ms:g} ms")
+    ms, _ = timed(lambda: client.fetch("legal"), args.repeat)
+    print(f"{'no cache':>28}: {ms:8.2f} ms median")
+
+    ms, (_, state) = timed(lambda: cache.get("robbery"), 1)
+    print(f"{'cold miss':>28}: {ms:8.2f} ms ({state})")
+    ms, (_, state) = timed(lambda: cache.get("robbery"), args.repeat)
+    print(f"{'warm hit':>28}: {ms:8.3f} ms median ({state})")
+
+    time.sleep(0.6)
+    Upstream.delay = 2.0
+    ms, (articles, state) = timed(lambda: cache.get("robbery"), args.repeat)
+    print(f"{'expired, upstream 2 s slow':>28}: {ms:8.3f} ms median ({state}, {len(articles)} articles)")
+
+    Upstream.fail = True
+    Upstream.delay = 0
+    time.sleep(0.6)
+    ms, (articles, state) = timed(lambda: cache.get("robbery"), args.repeat)
+    print(f"{'expired, upstream down':>28}: {ms:8.3f} ms median ({state}, {len(articles)} articles)")
+    ms, (articles, state) = timed(lambda: cache.get("dowry"), 1)
+    print(f"{'new topic, upstream down':>28}: {ms:8.2f} ms ({state}, {len(articles)} articles)")
+
+    time.sleep(2.5)
+    print(f"upstream calls: {Upstream.calls}, cache: { {k: v for k, v in cache.stats().items() if k != 'topics'} }")
+    cache.stop()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
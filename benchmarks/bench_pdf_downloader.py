@@ -0,0 +1,155 @@
+"""PdfDownloader against a local server that serves the PDFs in static/pdfs.
+
+The server supports HEAD, ETag and Range requests and adds a fixed delay
+per request, like a slow remote site. The script compares serial and
+pooled downloads, then checks the other paths of the pipeline: a rerun
+that skips everything, a download cut off mid-stream and resumed with a
+Range request, the same content under two URLs, and an HTML error page
+where a PDF was expected. No network access is needed.
+
+Run from the project root:  python -m benchmarks.bench_pdf_downloader [--workers 4] [--files 24]
+"""
+import argparse
+import hashlib
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote
+
+from pdf_downloader import PdfDownloader
+
+SAMPLE_DIR = Path("static/pdfs")
+
+
+class Upstream:
+    files = {}
+    delay = 0.05
+    cut_after = {}  # name -> bytes sent before the connection is dropped, once
+    requests = 0
+    ranges = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def _send_pdf(self, head):
+        Upstream.requests += 1
+        time.sleep(Upstream.delay)
+        name = unquote(self.path.lstrip("/"))
+        if name == "rate-limited.pdf":
+            body = b"<html><body>Too many requests</body></html>"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head:
+                self.wfile.write(body)
+            return
+        data = Upstream.files.get(name)
+        if data is None:
+            self.send_error(404)
+            return
+        etag = '"%s"' % hashlib.md5(data).hexdigest()
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range", etag) == etag:
+            start = int(range_header.split("=")[1].split("-")[0])
+            Upstream.ranges += 1
+            if start >= len(data):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+        body = data[start:]
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        if head:
+            return
+        cut = Upstream.cut_after.pop(name, None)
+        if cut is not None:
+            self.wfile.write(body[:cut])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_pdf(head=False)
+
+    def do_HEAD(self):
+        self._send_pdf(head=True)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(base_url, names, out_dir, workers, rate=0):
+    downloader = PdfDownloader(out_dir, workers=workers, rate=rate, timeout=(2, 5), retries=0)
+    start = time.perf_counter()
+    futures = [downloader.submit(f"{base_url}/{name}", Path(out_dir) / name) for name in names]
+    results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - start
+    downloader.close()
+    return elapsed, results, downloader.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--files", type=int, default=24)
+    parser.add_argument("--delay-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    samples = sorted(SAMPLE_DIR.glob("*.pdf"))[:args.files]
+    Upstream.files = {f"case{i}.pdf": path.read_bytes() for i, path in enumerate(samples)}
+    Upstream.delay = args.delay_ms / 1000
+    names = list(Upstream.files)
+    total_mb = sum(len(data) for data in Upstream.files.values()) / 1e6
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    work_dir = Path(tempfile.mkdtemp(prefix="pdf_downloader_"))
+    print(f"{len(names)} PDFs ({total_mb:.1f} MB), {args.delay_ms:g} ms per request")
+
+    try:
+        elapsed, _, stats = run(base_url, names, work_dir / "serial", workers=1)
+        print(f"{'serial':>24}: {elapsed:6.2f} s  {stats}")
+        elapsed, _, stats = run(base_url, names, work_dir / "pooled", workers=args.workers)
+        print(f"{f'{args.workers} workers':>24}: {elapsed:6.2f} s  {stats}")
+        elapsed, _, stats = run(base_url, names, work_dir / "pooled", workers=args.workers)
+        print(f"{'rerun (all on disk)':>24}: {elapsed:6.2f} s  {stats}")
+
+        name = names[0]
+        resume_dir = work_dir / "resume"
+        Upstream.cut_after[name] = len(Upstream.files[name]) // 2
+        _, (result,), _ = run(base_url, [name], resume_dir, workers=1)
+        part_size = (resume_dir / f"{name}.part").stat().st_size if (resume_dir / f"{name}.part").exists() else 0
+        print(f"{'cut off mid-stream':>24}: {result['status']}, {part_size} bytes kept in .part, "
+              f"no {name}: {not (resume_dir / name).exists()}")
+        ranges = Upstream.ranges
+        _, (result,), _ = run(base_url, [name], resume_dir, workers=1)
+        intact = (resume_dir / name).read_bytes() == Upstream.files[name]
+        print(f"{'rerun':>24}: {result['status']}, Range requests {Upstream.ranges - ranges}, intact: {intact}")
+
+        Upstream.files["copy-of-case0.pdf"] = Upstream.files[name]
+        _, (result,), _ = run(base_url, ["copy-of-case0.pdf"], resume_dir, workers=1)
+        print(f"{'same content, new URL':>24}: {result['status']} -> {Path(result['path']).name}")
+
+        _, (result,), _ = run(base_url, ["rate-limited.pdf"], resume_dir, workers=1)
+        print(f"{'HTML instead of PDF':>24}: {result['status']} ({result['error']}), "
+              f"nothing written: {not any(resume_dir.glob('rate-limited*'))}")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Local practice-area classifier vs. the Gemini call it replaces.
+
+LABELLED holds search-style queries with the label a reviewer would pick
+from the lawyers.csv vocabulary ("General" when none fits). They were
+labelled by hand, not by the model. With --llm the script also asks Gemini
+(the same prompt as get_practice_area_keywords) and reports its latency and
+how often the local answer agrees with it. NEGATIVE holds queries whose
+words contain a rule's keyword, or an ambiguous one, that must not get
+that label. A confident wrong label would skip the LLM. Accuracy counts
+them too.
+
+Run from the project root:  python -m benchmarks.bench_practice_area [--llm]
+"""
+import argparse
+import time
+
+from practice_areas import PracticeAreaClassifier
+
+LABELLED = [
+    ("dowry death", "Dowry Case"),
+    ("harassment for dowry 498A", "Dowry Case"),
+    ("section 304B IPC conviction", "Dowry Case"),
+    ("murder", "Criminal"),
+    ("robbery", "Criminal"),
+    ("culpable homicide not amounting to murder", "Criminal"),
+    ("kidnapping for ransom", "Criminal"),
+    ("acid attack compensation", "Criminal"),
+    ("extortion by gang", "Criminal"),
+    ("riot and unlawful assembly", "Criminal"),
+    ("criminal trespass", "Criminal"),
+    ("rape conviction appeal", "Criminal"),
+    ("human trafficking", "Criminal"),
+    ("assault on public servant", "Criminal"),
+    ("domestic violence protection order", "Domestic Violence"),
+    ("wife beaten by husband domestic violence act", "Domestic Violence"),
+    ("mutual consent divorce", "Divorce"),
+    ("alimony after divorce", "Divorce"),
+    ("child custody after separation", "Child Custody"),
+    ("maintenance under section 125 crpc", "Family"),
+    ("cheque bounce case", "Cheque Bounce"),
+    ("dishonour of cheque section 138 NI act", "Cheque Bounce"),
+    ("anticipatory bail", "Anticipatory Bail"),
+    ("bail in murder case", "Criminal"),
+    ("money laundering", "Pmla"),
+    ("PMLA attachment of property", "Pmla"),
+    ("forgery of documents", "Fraud Case"),
+    ("cheating and fraud section 420", "Fraud Case"),
+    ("online fraud upi", "Cyber Crime"),
+    ("pocso act", "Pocso Act"),
+    ("bribery by public servant", "Anti Corruption"),
+    ("tenant not vacating eviction", "Landlord/Tenant"),
+    ("property partition suit", "Property"),
+    ("legal heir succession certificate", "Succession Certificate"),
+    ("defective product consumer complaint", "Consumer Court"),
+    ("wrongful termination from service", "Labour & Service"),
+    ("trademark infringement", "Trademark & Copyright"),
+    ("insolvency proceedings IBC", "Bankruptcy / Insolvency"),
+    ("road accident compensation", "Motor Accident"),
+    ("medical negligence by hospital", "Medical Negligence"),
+    ("builder delay in flat possession", "RERA"),
+    ("gst notice", "GST"),
+    ("court marriage registration", "Court Marriage"),
+    ("state", "General"),
+    ("[2025] 10 S.C.R. 572", "General"),
+    ("constitution bench reference", "General"),
+]
+
+# (query, label it must not be given). Falling back to the LLM is fine.
+NEGATIVE = [
+    ("police custody torture", "Child Custody"),
+    ("advisable to withdraw the petition", "Immigration"),
+    ("patriotic speech sedition", "Criminal"),
+    ("patently illegal order", "Patent"),
+    ("hurtling truck hit pedestrian", "Criminal"),
+    ("regular bail after chargesheet", "Anticipatory Bail"),
+    ("custody of seized vehicle", "Child Custody"),
+    ("salooning licence cancelled", "Banking / Finance"),
+]
+
+
+def llm_labeller():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    from gemini_pool import GeminiPool
+
+    pool = GeminiPool.from_env()
+
+    def label(query):
+        prompt = f"""
+        Extract the main legal practice area from this query: "{query}".
+        Return ONLY the single word or short phrase (e.g., "Divorce", "Criminal", "Property", "Corporate", "Cheque Bounce").
+        If no specific area matches, return "General".
+        """
+        return pool.generate("gemini-flash-latest", prompt).strip()
+
+    return label
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm", action="store_true", help="also label the queries with Gemini (needs API keys)")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    classifier = PracticeAreaClassifier.from_csv("lawyers.csv")
+    queries = [query for query, _ in LABELLED]
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for query in queries:
+            classifier.classify(query)
+    per_query = (time.perf_counter() - start) / (args.repeat * len(queries))
+
+    confident = correct = 0
+    for query, expected in LABELLED:
+        label = classifier.label(query)
+        if label is not None:
+            confident += 1
+        # Low-confidence queries go to the LLM; count them as right only when no area applies.
+        correct += (label or "General") == expected
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for query in queries:
+            classifier.label(query)
+    cached = (time.perf_counter() - start) / (args.repeat * len(queries))
+
+    print(f"{len(LABELLED)} labelled queries, vocabulary of {len(classifier.vocabulary)} practice areas")
+    print(f"local classify:   {per_query * 1e6:8.1f} us/query")
+    print(f"cached label:     {cached * 1e6:8.1f} us/query")
+    print(f"answered locally: {confident}/{len(LABELLED)} ({confident / len(LABELLED):.0%}), rest fall back to the LLM")
+    false_positives = [(query, wrong) for query, wrong in NEGATIVE if classifier.label(query) == wrong]
+    correct += len(NEGATIVE) - len(false_positives)
+    total = len(LABELLED) + len(NEGATIVE)
+    print(f"false positives:  {len(false_positives)}/{len(NEGATIVE)} negative queries"
+          + "".join(f"\n  {query!r} -> {wrong}" for query, wrong in false_positives))
+    print(f"accuracy:         {correct}/{total} ({correct / total:.0%}), negatives included")
+
+    if args.llm:
+        label = llm_labeller()
+        agree = 0
+        latencies = []
+        for query, _ in LABELLED:
+            start = time.perf_counter()
+            llm_label = label(query)
+            latencies.append(time.perf_counter() - start)
+            local = classifier.label(query)
+            agree += local is None or local.lower() == llm_label.lower()
+        latencies.sort()
+        print(f"LLM latency:      {latencies[len(latencies) // 2] * 1000:8.1f} ms median")
+        print(f"agrees with LLM:  {agree}/{len(LABELLED)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Recall@10 vs. latency of the IVF engine against the exact scan.
+
+Run from the project root:  python -m benchmarks.bench_retrieval
+"""
+import argparse
+import time
+
+import numpy as np
+
+from retrieval import ExactEngine, IVFEngine
+
+
+def clustered_corpus(n, dim, n_topics, rng):
+    # Case embeddings cluster by subject matter; uniform noise would make every
+    # partition equally close and understate what IVF can do.
+    topics = rng.standard_normal((n_topics, dim)).astype(np.float32)
+    labels = rng.integers(0, n_topics, n)
+    vectors = topics[labels] + 0.9 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = clustered_corpus(args.cases, args.dim, args.topics, rng)
+    ids = np.arange(1, args.cases + 1)
+    queries = vectors[rng.choice(args.cases, args.queries, replace=False)]
+    queries = queries + 0.5 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    exact = ExactEngine()
+    exact.add(ids, vectors)
+    ivf = IVFEngine(train_threshold=1)
+    start = time.perf_counter()
+    ivf.add(ids, vectors)
+    print(f"IVF build: {time.perf_counter() - start:.1f}s, {len(ivf.centroids)} lists, {args.cases} cases")
+
+    start = time.perf_counter()
+    truth = [set(exact.search_window(q, 0, 10)[0]) for q in queries]
+    exact_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+    print(f"{'engine':>12} {'recall@10':>10} {'ms/query':>10}")
+    print(f"{'exact':>12} {1.0:>10.3f} {exact_ms:>10.2f}")
+    for nprobe in args.nprobe:
+        hits = 0
+        start = time.perf_counter()
+        for q, expected in zip(queries, truth):
+            found = ivf.search_window(q, 0, 10, nprobe=nprobe)[0]
+            hits += len(expected.intersection(found))
+        ms = (time.perf_counter() - start) / len(queries) * 1000
+        print(f"{f'ivf/{nprobe}':>12} {hits / (10 * len(queries)):>10.3f} {ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Search-result row parsing: per-row BeautifulSoup vs. scr_parser.parse_rows.
+
+The fixtures in benchmarks/fixtures are #example_pdf tbody pages built
+from rows in csv/, with the markup of the search results page. The
+"before" parser is the per-row extract_text_from_row_html that
+scraping.py used until parse_rows replaced it, copied here unchanged.
+It gets each row's HTML pre-split, so its timing leaves out the
+driver round trip per row that it also needed. The script checks that
+both produce the same fields before timing them.
+
+Run from the project root:  python -m benchmarks.bench_row_parser [--repeat 20]
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+
+import lxml.html
+from bs4 import BeautifulSoup
+
+from scr_parser import FIELDS, parse_rows
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def extract_text_from_row_html(html):
+    """Takes the HTML of a single TR and returns a dict of its text data."""
+    soup = BeautifulSoup(html, "html.parser")
+    tr = soup
+
+    title = ""
+    citation = ""
+    coram = ""
+    decision_date = ""
+    case_no = ""
+    bench = ""
+
+    btn = tr.find("button")
+    if btn:
+        title = " ".join(btn.stripped_strings)
+    else:
+        all_a = tr.find_all("a")
+        for a in all_a:
+            onclick = a.get("onclick", "")
+            if "open_pdf" not in onclick:
+                title = " ".join(a.stripped_strings)
+                if title:
+                    break
+
+    es = tr.find("span", class_="escrText")
+    if es:
+        citation = es.get_text(strip=True)
+    strongs = tr.find_all("strong")
+    for s in strongs:
+        txt = s.get_text(" ", strip=True)
+        if txt.lower().startswith("coram"):
+            coram = txt
+
+    textall = tr.get_text(" ", strip=True)
+    m_date = re.search(
+        r"Decision Date\s*[:\-]?\s*([0-9]{2}-[0-9]{2}-[0-9]{4})", textall
+    )
+    if m_date:
+        decision_date = m_date.group(1)
+
+    m_case = re.search(r"Case No\s*[:\-]?\s*([^\|]+)", textall)
+    if m_case:
+        case_no = m_case.group(1).strip()
+
+    m_bench = re.search(
+        r"Bench\s*[:\-]?\s*([0-9]+\s*Judges|[A-Za-z0-9 ,\-&]+)", textall
+    )
+    if m_bench:
+        bench = m_bench.group(1).strip()
+
+    return {
+        "title": title,
+        "citation": citation,
+        "coram": coram,
+        "decision_date": decision_date,
+        "case_no": case_no,
+        "bench": bench,
+    }
+
+
+def split_rows(tbody_html):
+    """Each row's outerHTML, as the old loop read them one get_attribute call at a time."""
+    table = lxml.html.fragment_fromstring(f"<table>{tbody_html}</table>")
+    return [lxml.html.tostring(tr, encoding="unicode") for tr in table.iter("tr")]
+
+
+def rows_per_second(fn, pages, rows, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            fn(page)
+    return rows * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = [path.read_text(encoding="utf-8") for path in sorted(FIXTURES.glob("scr_results_page*.html"))]
+    split_pages = [split_rows(page) for page in pages]
+    rows = sum(len(page) for page in split_pages)
+
+    mismatches = 0
+    for page, page_rows in zip(pages, split_pages):
+        for old, new in zip((extract_text_from_row_html(row) for row in page_rows), parse_rows(page)):
+            mismatches += any(old[field] != new[field] for field in FIELDS)
+    with_pdf = sum(record["pdf_url"] is not None for page in pages for record in parse_rows(page))
+
+    before = rows_per_second(lambda page_rows: [extract_text_from_row_html(row) for row in page_rows],
+                             split_pages, rows, args.repeat)
+    after = rows_per_second(parse_rows, pages, rows, args.repeat)
+
+    print(f"{len(pages)} fixture pages, {rows} rows, {mismatches} rows whose fields differ, {with_pdf} with a PDF URL")
+    print(f"per-row BeautifulSoup: {before:10.0f} rows/s")
+    print(f"parse_rows (lxml):     {after:10.0f} rows/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import threading
+
+import numpy as np
+
+from embedding_store import decode_embedding
+from retrieval import ExactEngine
+
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+class CaseIndex:
+    """Process-wide cosine index over cases.embedding.
+
+    Rows are L2-normalized and handed to a retrieval engine (see
+    retrieval.py); the exact engine ranks a query with a single
+    matrix-vector product. The table is append-only from the app's point of
+    view, so refresh() only reads rows with an id above the highest one the
+    engine already holds. An engine loaded from disk is checked against the
+    table on the first refresh and rebuilt from scratch if it doesn't match.
+    """
+
+    table = "cases"
+    # Columns read alongside each embedding and handed to _on_indexed().
+    extra_columns = ()
+
+    def __init__(self, engine=None):
+        self._refresh_lock = threading.Lock()
+        self.engine = engine if engine is not None else ExactEngine()
+        self.dim = self.engine.dim
+        self.last_id = self.engine.max_id
+        self._skipped = set()
+        self._checked = False
+
+    def __len__(self):
+        return len(self.engine)
+
+    def refresh(self, conn):
+        """Loads cases added since the last refresh. Returns the number of rows indexed."""
+        with self._refresh_lock:
+            if not self._checked:
+                self._check_saved_engine(conn)
+                self._checked = True
+            columns = ", ".join(("id", "embedding", *self.extra_columns))
+            rows = conn.execute(
+                f"SELECT {columns} FROM {self.table} WHERE id > ? ORDER BY id", (self.last_id,)
+            ).fetchall()
+            if not rows:
+                return 0
+
+            ids = []
+            vectors = []
+            extras = []
+            for row_id, raw, *extra in rows:
+                vec = decode_embedding(raw)
+                if vec is None:
+                    continue
+                if self.dim is None:
+                    self.dim = vec.size
+                if vec.size != self.dim:
+                    if row_id not in self._skipped:
+                        self._skipped.add(row_id)
+                        print(f"{type(self).__name__}: skipping {self.table} row {row_id}, dimension {vec.size} != {self.dim}")
+                    continue
+                ids.append(row_id)
+                vectors.append(vec)
+                extras.append(extra)
+
+            if vectors:
+                self._on_indexed(ids, extras)
+                self.engine.add(ids, normalize_rows(np.vstack(vectors)))
+                self.engine.save(self._fingerprint(conn, ids[-1]))
+                # Only past what was indexed: a later row whose embedding is still NULL is read again next time.
+                self.last_id = ids[-1]
+            return len(ids)
+
+    def _fingerprint(self, conn, max_id):
+        """(row count, highest id, embedding bytes) of the table up to `max_id`, the rows a saved engine was built from.
+
+        The byte total changes when ingest.py re-embeds a row that had no
+        usable embedding, so a saved engine that is missing that row is rebuilt.
+        """
+        return tuple(conn.execute(
+            f"SELECT count(*), COALESCE(MAX(id), 0), COALESCE(SUM(length(embedding)), 0) FROM {self.table} WHERE id <= ?",
+            (max_id,),
+        ).fetchone())
+
+    def _check_saved_engine(self, conn):
+        """Empties an engine loaded from disk whose rows no longer match the table (replaced or rebuilt DB)."""
+        if len(self.engine) == 0:
+            return
+        fingerprint = self._fingerprint(conn, self.engine.max_id)
+        if self.engine.fingerprint == fingerprint:
+            return
+        print(f"{type(self).__name__}: saved index {self.engine.fingerprint} doesn't match {self.table} {fingerprint}; rebuilding")
+        self.engine.reset()
+        self.dim = None
+        self.last_id = 0
+        self._skipped.clear()
+
+    def _on_indexed(self, ids, extras):
+        """Called under the refresh lock with the rows about to be added, before search can return them."""
+
+    def search_window(self, q_vec, start, stop):
+        """Returns (ids, scores) for the cases ranked start..stop-1 by cosine similarity."""
+        if len(self.engine) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        q = np.asarray(q_vec, dtype=np.float32)
+        q_norm = np.linalg.norm(q)
+        if q_norm:
+            q = q / q_norm
+        return self.engine.search_window(q, start, stop)
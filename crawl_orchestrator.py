@@ -0,0 +1,264 @@
+"""Crawls many search topics in parallel over a pool of headless browsers.
+
+Each worker thread owns a headless Chrome and its own requests.Session.
+The worker takes the next topic from the queue, gets past the search
+CAPTCHA, copies the browser's cookies into its session and runs
+scraping.scrape_and_download() for that topic. All workers share:
+
+- one CrawlState journal, so any topic resumes where the last run stopped
+  and finished topics are skipped;
+- one PdfDownloader. Its RateLimiter paces everything sent to the court site
+  across all workers: search page loads and submits, results-page requests,
+  table draws, PDF clicks and downloads. Adding browsers doesn't add load
+  on the site;
+- one CaptchaDesk. Workers post their CAPTCHA image there, and the person
+  running the crawl answers them one at a time in this terminal.
+
+A rate-limit stop in any worker stops the others from taking new topics,
+as the limit applies to the whole IP. Per-topic progress and throughput
+are printed every --report-every seconds:
+
+    python crawl_orchestrator.py [topics...] [--workers 3] [--rate 0.5] [--visible] [--state crawl_state.db]
+
+With --visible the browsers are shown, and the desk asks the person to
+solve each CAPTCHA in the named window instead of typing it here.
+"""
+import argparse
+import queue
+import threading
+import time
+from pathlib import Path
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from crawl_state import STATE_PATH, CrawlState, csv_path_for
+from pdf_downloader import PdfDownloader, RateLimiter, pooled_session
+from scraping import (DOWNLOAD_RATE, DOWNLOAD_WORKERS, PAGE_LEN, PAGE_LOAD_TIMEOUT, PDF_DIR, SEARCH_URL, TOPICS,
+                      attach_cookies_to_session, get_selenium_cookies, init_driver, pace, scrape_and_download)
+
+# The search form's CAPTCHA widgets. These are matched loosely because the
+# page markup isn't versioned; adjust them if the form changes.
+CAPTCHA_IMAGE = "img[id*='captcha' i], img[src*='captcha' i]"
+CAPTCHA_INPUT = "input[id*='captcha' i], input[name*='captcha' i]"
+SEARCH_BUTTON = "#main_search, button[type='submit'], input[type='submit']"
+RESULTS_ROW = "table#example_pdf tbody tr"
+CAPTCHA_DIR = Path("captchas")
+CAPTCHA_ATTEMPTS = 3
+SESSION_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+class CaptchaDesk:
+    """Hand-off queue between the workers and the one person solving CAPTCHAs.
+
+    ask() is called from worker threads and blocks until serve() gives an
+    answer. serve() runs on the main thread, which owns the terminal.
+    """
+
+    def __init__(self):
+        self._requests = queue.Queue()
+
+    def ask(self, worker, query, image_path=None):
+        reply = queue.Queue(maxsize=1)
+        self._requests.put((worker, query, image_path, reply))
+        return reply.get()
+
+    def serve(self, done):
+        """Answers requests until `done()` is true and nothing is waiting."""
+        while True:
+            try:
+                worker, query, image_path, reply = self._requests.get(timeout=0.5)
+            except queue.Empty:
+                if done():
+                    return
+                continue
+            print(f"\nCAPTCHA for {worker} ({query!r}), {self._requests.qsize()} more waiting")
+            if image_path:
+                reply.put(input(f"Open {image_path} and type the characters: ").strip())
+            else:
+                input(f"Solve it in {worker}'s browser window, click Search, then press ENTER... ")
+                reply.put(None)
+
+
+class TopicProgress:
+    """Per-topic timings; the counts themselves come from the crawl journal."""
+
+    def __init__(self, state):
+        self.state = state
+        self._lock = threading.Lock()
+        self._started = {}
+        self._baseline = {}
+        self._workers = {}
+        self._finished = {}
+
+    def start(self, query, worker):
+        done = {t["query"]: t["done"] for t in self.state.progress()}.get(query, 0)
+        with self._lock:
+            self._started[query] = time.time()
+            self._baseline[query] = done
+            self._workers[query] = worker
+
+    def finish(self, query):
+        with self._lock:
+            self._finished[query] = time.time()
+
+    def report(self, downloader, since):
+        with self._lock:
+            started, baseline = dict(self._started), dict(self._baseline)
+            workers, finished = dict(self._workers), dict(self._finished)
+        lines = []
+        for topic in self.state.progress():
+            query = topic["query"]
+            if query not in started:
+                continue
+            elapsed = finished.get(query, time.time()) - started[query]
+            rate = (topic["done"] - baseline[query]) / elapsed * 60 if elapsed > 0 else 0
+            lines.append(f"  {query:<20} {workers[query]:<9} {topic['status']:<8} "
+                         f"pages {topic['pages']}/{topic['total_pages'] or '?':<4} done {topic['done']:<5} "
+                         f"failed {topic['failed']:<3} queued {topic['queued']:<3} {rate:6.1f} rows/min")
+        stats = downloader.stats()
+        elapsed = time.time() - since
+        fetched = stats["downloaded"] + stats["resumed"]
+        lines.append(f"  PDFs: {fetched} new, {stats['skipped']} skipped, {stats['duplicate']} duplicate, "
+                     f"{stats['failed']} failed; {fetched / elapsed * 60:.1f}/min, "
+                     f"{stats['bytes'] / 1e6 / elapsed:.2f} MB/s over {elapsed:.0f}s")
+        return "\n".join(lines)
+
+
+def open_results(driver, worker, query, desk, headless, limiter=None):
+    """Runs the search for `query`, getting a person to solve the CAPTCHA. Returns the results URL."""
+    for attempt in range(CAPTCHA_ATTEMPTS):
+        pace(limiter)
+        driver.get(SEARCH_URL)
+        search_box = WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
+            EC.presence_of_element_located((By.ID, "search_text"))
+        )
+        search_box.clear()
+        search_box.send_keys(query)
+
+        if headless:
+            CAPTCHA_DIR.mkdir(exist_ok=True)
+            image_path = CAPTCHA_DIR / f"{worker}.png"
+            driver.find_element(By.CSS_SELECTOR, CAPTCHA_IMAGE).screenshot(str(image_path))
+            answer = desk.ask(worker, query, image_path)
+            field = driver.find_element(By.CSS_SELECTOR, CAPTCHA_INPUT)
+            field.clear()
+            field.send_keys(answer)
+            pace(limiter)
+            driver.find_element(By.CSS_SELECTOR, SEARCH_BUTTON).click()
+        else:
+            desk.ask(worker, query)
+
+        try:
+            WebDriverWait(driver, PAGE_LOAD_TIMEOUT + 5).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, RESULTS_ROW))
+            )
+            return driver.current_url
+        except Exception:
+            print(f"[{worker}] No results for {query!r} after CAPTCHA attempt {attempt + 1}; retrying.")
+    raise RuntimeError(f"could not get past the CAPTCHA for {query!r}")
+
+
+def run_worker(worker, topics, state, downloader, desk, progress, stop, headless, max_pages):
+    driver = init_driver(headless=headless)
+    session = pooled_session(DOWNLOAD_WORKERS, SESSION_HEADERS)
+    try:
+        while not stop.is_set():
+            try:
+                query = topics.get_nowait()
+            except queue.Empty:
+                return
+            if state.start_topic(query, PAGE_LEN) == "done":
+                print(f"[{worker}] {query!r} already crawled; skipping.")
+                continue
+            progress.start(query, worker)
+            try:
+                base_results_url = open_results(driver, worker, query, desk, headless, downloader.limiter)
+                attach_cookies_to_session(session, get_selenium_cookies(driver))
+                session.headers.update({"Referer": base_results_url})
+                complete = scrape_and_download(driver, session, base_results_url, downloader, state, query,
+                                               PAGE_LEN, max_pages)
+            except Exception as e:
+                # Likely this topic's CAPTCHA or page, not the site as a whole; move on to the next topic.
+                progress.finish(query)
+                state.stop_topic(query)
+                print(f"[{worker}] {query!r} failed: {type(e).__name__}: {e}")
+                continue
+            progress.finish(query)
+            if complete:
+                rows = state.finish_topic(query)
+                print(f"[{worker}] Saved CSV: {csv_path_for(query)} ({rows} rows)")
+            else:
+                state.stop_topic(query)
+                stop.set()
+                print(f"[{worker}] Stopped during {query!r}; other workers will finish their topics and exit.")
+    finally:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        session.close()
+
+
+def crawl(topics, workers=3, rate=DOWNLOAD_RATE, headless=True, state_path=STATE_PATH, max_pages=100,
+          report_every=30):
+    """Crawls `topics` over `workers` browsers. Returns True if every topic finished."""
+    state = CrawlState(state_path)
+    downloader = PdfDownloader(PDF_DIR, workers=DOWNLOAD_WORKERS, limiter=RateLimiter(rate))
+    desk = CaptchaDesk()
+    progress = TopicProgress(state)
+    stop = threading.Event()
+    pending = queue.Queue()
+    for query in topics:
+        pending.put(query)
+
+    started = time.time()
+    # Daemon threads so Ctrl-C ends the crawl; the journal keeps what was finished.
+    threads = [threading.Thread(target=run_worker, name=f"worker-{i + 1}", daemon=True,
+                                args=(f"worker-{i + 1}", pending, state, downloader, desk, progress, stop, headless,
+                                      max_pages))
+               for i in range(min(workers, len(topics)))]
+    for thread in threads:
+        thread.start()
+
+    def reporter():
+        while any(t.is_alive() for t in threads):
+            time.sleep(report_every)
+            print(f"\nProgress after {time.time() - started:.0f}s:\n{progress.report(downloader, started)}")
+
+    threading.Thread(target=reporter, name="progress", daemon=True).start()
+    try:
+        desk.serve(lambda: not any(t.is_alive() for t in threads))
+    except KeyboardInterrupt:
+        stop.set()
+        print("\nInterrupted; run again to resume from the journal.")
+        raise
+    for thread in threads:
+        thread.join()
+    downloader.close()
+
+    print(f"\nFinal progress:\n{progress.report(downloader, started)}")
+    complete = all(t["status"] == "done" for t in state.progress() if t["query"] in topics)
+    state.close()
+    return complete
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl several topics in parallel over headless browsers")
+    parser.add_argument("topics", nargs="*", default=TOPICS)
+    parser.add_argument("--workers", type=int, default=3, help="browsers running at once")
+    parser.add_argument("--rate", type=float, default=DOWNLOAD_RATE,
+                        help="requests per second to the court site, across all workers")
+    parser.add_argument("--visible", action="store_true", help="show the browsers and solve CAPTCHAs in them")
+    parser.add_argument("--state", default=STATE_PATH)
+    parser.add_argument("--max-pages", type=int, default=100)
+    parser.add_argument("--report-every", type=float, default=30)
+    args = parser.parse_args()
+
+    done = crawl(args.topics, args.workers, args.rate, not args.visible, args.state, args.max_pages, args.report_every)
+    print("All topics crawled." if done else "Some topics are unfinished; run again to resume.")
@@ -0,0 +1,237 @@
+"""Checkpointed crawl progress for scraping.py.
+
+A crawl over the Supreme Court search is one topic (search query) after
+another. Each topic is a run of result pages, and each page is a run of
+rows. CrawlState journals every row it has seen to a small SQLite file,
+keyed by (query, page, row), together with the row's fields, PDF URL and
+final PDF path. A row is "queued" until its download finishes and then
+becomes "done" (or "failed"). A page is listed once all of its rows have
+been journalled, so after a crash or a rate-limit stop, resume_page() and
+finished_rows() tell the scraper exactly where to pick up.
+
+Each finished row is appended straight to "<topic csv>.partial". When a
+topic completes, its CSV is written from the journal in page/row order
+(rows finished out of order by the download pool end up sorted), and the
+partial file is removed. The CSV from an earlier crawl stays in place
+until then:
+
+    python crawl_state.py [--state crawl_state.db]            progress per topic
+    python crawl_state.py export [--state crawl_state.db]     rewrite every topic's CSV from the journal
+"""
+import argparse
+import csv
+import os
+import re
+import threading
+from pathlib import Path
+
+from db import connect
+
+CSV_DIR = Path("csv")
+CSV_COLUMNS = ("title", "citation", "coram", "decision_date", "case_no", "bench", "pdf_path_or_url")
+STATE_PATH = "crawl_state.db"
+
+
+def csv_path_for(query, csv_dir=CSV_DIR):
+    """'Culpable Homicide' -> csv/scr_search_results_culpable_homicide.csv"""
+    slug = re.sub(r"[^a-z0-9]+", "_", query.lower()).strip("_")
+    return Path(csv_dir) / f"scr_search_results_{slug}.csv"
+
+
+def partial_path_for(query, csv_dir=CSV_DIR):
+    path = csv_path_for(query, csv_dir)
+    return path.with_name(path.name + ".partial")
+
+
+def ensure_schema(conn):
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS crawl_topics (
+            query TEXT PRIMARY KEY,
+            csv_path TEXT NOT NULL,
+            page_len INTEGER,
+            total_pages INTEGER,
+            status TEXT NOT NULL DEFAULT 'pending',
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS crawl_pages (
+            query TEXT NOT NULL,
+            page INTEGER NOT NULL,
+            rows INTEGER NOT NULL,
+            PRIMARY KEY (query, page)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS crawl_rows (
+            query TEXT NOT NULL,
+            page INTEGER NOT NULL,
+            row INTEGER NOT NULL,
+            title TEXT,
+            citation TEXT,
+            coram TEXT,
+            decision_date TEXT,
+            case_no TEXT,
+            bench TEXT,
+            pdf_url TEXT,
+            pdf_path TEXT,
+            status TEXT NOT NULL DEFAULT 'queued',
+            error TEXT,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (query, page, row)
+        ) WITHOUT ROWID;
+    ''')
+
+
+class CrawlState:
+    """The crawl journal. Safe to call from the download worker threads."""
+
+    def __init__(self, path=STATE_PATH, csv_dir=CSV_DIR):
+        self.path = path
+        self.csv_dir = Path(csv_dir)
+        self.conn = connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self.conn:
+            ensure_schema(self.conn)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def start_topic(self, query, page_len):
+        """Registers `query` (keeping its progress if known) and returns its status."""
+        with self._lock, self.conn:
+            self.conn.execute('''INSERT INTO crawl_topics (query, csv_path, page_len) VALUES (?, ?, ?)
+                                 ON CONFLICT(query) DO NOTHING''', (query, str(csv_path_for(query, self.csv_dir)), page_len))
+            status, known_len = self.conn.execute("SELECT status, page_len FROM crawl_topics WHERE query = ?",
+                                                  (query,)).fetchone()
+            if known_len != page_len and self.conn.execute("SELECT 1 FROM crawl_pages WHERE query = ?", (query,)).fetchone():
+                # Page numbers are only meaningful at the page length they were crawled with.
+                raise ValueError(f"{query!r} was crawled with {known_len} rows per page, not {page_len}")
+            if status != "done":
+                self.conn.execute("UPDATE crawl_topics SET status = 'running', page_len = ?, updated_at = CURRENT_TIMESTAMP "
+                                  "WHERE query = ?", (page_len, query))
+        return status
+
+    def set_total_pages(self, query, total_pages):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE crawl_topics SET total_pages = ? WHERE query = ?", (total_pages, query))
+
+    def resume_page(self, query):
+        """First page that is not listed or still has unfinished rows."""
+        with self._lock:
+            listed = dict(self.conn.execute("SELECT page, rows FROM crawl_pages WHERE query = ?", (query,)))
+            finished = dict(self.conn.execute("SELECT page, COUNT(*) FROM crawl_rows WHERE query = ? AND status != 'queued' "
+                                              "GROUP BY page", (query,)))
+        page = 0
+        while page in listed and finished.get(page, 0) >= listed[page]:
+            page += 1
+        return page
+
+    def finished_rows(self, query, page):
+        """Row indexes on `page` that need no more work."""
+        with self._lock:
+            return {row for row, in self.conn.execute(
+                "SELECT row FROM crawl_rows WHERE query = ? AND page = ? AND status != 'queued'", (query, page))}
+
+    def record_row(self, query, page, row, fields, pdf_url):
+        """Journals a discovered row whose PDF is about to be downloaded."""
+        with self._lock, self.conn:
+            self.conn.execute('''INSERT INTO crawl_rows (query, page, row, title, citation, coram, decision_date, case_no,
+                                                         bench, pdf_url, status)
+                                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'queued')
+                                 ON CONFLICT(query, page, row) DO UPDATE SET
+                                     title = excluded.title, citation = excluded.citation, coram = excluded.coram,
+                                     decision_date = excluded.decision_date, case_no = excluded.case_no,
+                                     bench = excluded.bench, pdf_url = excluded.pdf_url, status = 'queued',
+                                     error = NULL, updated_at = CURRENT_TIMESTAMP''',
+                              (query, page, row, *(fields.get(c) for c in CSV_COLUMNS[:-1]), pdf_url))
+
+    def list_page(self, query, page, rows):
+        """Marks every row of `page` as journalled."""
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO crawl_pages (query, page, rows) VALUES (?, ?, ?)", (query, page, rows))
+
+    def complete_row(self, query, page, row, fields, pdf_path, status="done", error=None):
+        """Records a row's outcome and appends it to the topic's partial CSV."""
+        with self._lock:
+            with self.conn:
+                self.conn.execute('''UPDATE crawl_rows SET title = ?, pdf_path = ?, status = ?, error = ?,
+                                         updated_at = CURRENT_TIMESTAMP
+                                     WHERE query = ? AND page = ? AND row = ?''',
+                                  (fields.get("title"), pdf_path, status, error, query, page, row))
+                pdf_url, = self.conn.execute("SELECT pdf_url FROM crawl_rows WHERE query = ? AND page = ? AND row = ?",
+                                             (query, page, row)).fetchone() or (None,)
+            out_path = partial_path_for(query, self.csv_dir)
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            new_file = not out_path.exists()
+            with open(out_path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(CSV_COLUMNS)
+                writer.writerow([*(fields.get(c) or "" for c in CSV_COLUMNS[:-1]), pdf_path or pdf_url or ""])
+
+    def stop_topic(self, query):
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE crawl_topics SET status = 'stopped', updated_at = CURRENT_TIMESTAMP WHERE query = ?",
+                              (query,))
+
+    def finish_topic(self, query):
+        """Marks `query` done and writes its CSV in page/row order. Returns the number of rows."""
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE crawl_topics SET status = 'done', updated_at = CURRENT_TIMESTAMP WHERE query = ?",
+                              (query,))
+        rows = self.export_csv(query)
+        partial_path_for(query, self.csv_dir).unlink(missing_ok=True)
+        return rows
+
+    def retry_failed(self, query=None):
+        """Queues failed rows again so the next run retries their downloads. Returns how many."""
+        with self._lock, self.conn:
+            where = "status = 'failed'" + (" AND query = ?" if query else "")
+            args = (query,) if query else ()
+            self.conn.execute(f"UPDATE crawl_topics SET status = 'running' WHERE query IN "
+                              f"(SELECT DISTINCT query FROM crawl_rows WHERE {where})", args)
+            return self.conn.execute(f"UPDATE crawl_rows SET status = 'queued', error = NULL WHERE {where}", args).rowcount
+
+    def export_csv(self, query):
+        """Rewrites the topic's CSV from the journal. Returns the number of rows written."""
+        out_path = csv_path_for(query, self.csv_dir)
+        with self._lock:
+            rows = self.conn.execute('''SELECT title, citation, coram, decision_date, case_no, bench,
+                                               COALESCE(pdf_path, pdf_url, '')
+                                        FROM crawl_rows WHERE query = ? AND status != 'queued'
+                                        ORDER BY page, row''', (query,)).fetchall()
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{out_path}.tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            writer.writerows([[value or "" for value in row] for row in rows])
+        os.replace(tmp_path, out_path)
+        return len(rows)
+
+    def progress(self):
+        """[{query, status, pages, total_pages, done, failed, queued}, ...] per topic."""
+        with self._lock:
+            rows = self.conn.execute('''
+                SELECT t.query, t.status, t.total_pages,
+                       (SELECT COUNT(*) FROM crawl_pages p WHERE p.query = t.query),
+                       COUNT(r.row) FILTER (WHERE r.status = 'done'),
+                       COUNT(r.row) FILTER (WHERE r.status = 'failed'),
+                       COUNT(r.row) FILTER (WHERE r.status = 'queued')
+                FROM crawl_topics t LEFT JOIN crawl_rows r ON r.query = t.query
+                GROUP BY t.query ORDER BY t.rowid''').fetchall()
+        return [dict(zip(("query", "status", "total_pages", "pages", "done", "failed", "queued"), row)) for row in rows]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or export the scraper's crawl journal")
+    parser.add_argument("command", nargs="?", default="status", choices=["status", "export"])
+    parser.add_argument("--state", default=STATE_PATH)
+    args = parser.parse_args()
+
+    state = CrawlState(args.state)
+    for topic in state.progress():
+        if args.command == "export":
+            print(f"{topic['query']}: {state.export_csv(topic['query'])} rows -> {csv_path_for(topic['query'])}")
+        else:
+            print(f"{topic['query']:<24} {topic['status']:<8} pages {topic['pages']}/{topic['total_pages'] or '?'}  "
+                  f"done {topic['done']}  failed {topic['failed']}  queued {topic['queued']}")
+    state.close()
@@ -0,0 +1,121 @@
+"""SQLite connection handling for users.db.
+
+Every connection is opened through connect(), which switches the database
+to WAL so readers no longer block on the history writes in search_query,
+and applies the PRAGMAS below. ConnectionPool keeps those connections open
+between requests. A connection is checked out by one thread at a time.
+Borrow one with `with pool.connection() as conn:`, which hands it back even
+when the block raises; close() on a pooled connection also returns it to
+the pool instead of closing it.
+"""
+import contextlib
+import os
+import queue
+import sqlite3
+import threading
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    # NORMAL is durable across application crashes in WAL mode; only an OS crash can drop the last commits.
+    "synchronous": "NORMAL",
+    "cache_size": int(os.getenv("SQLITE_CACHE_KB", 32768)) * -1,
+    "mmap_size": int(os.getenv("SQLITE_MMAP_MB", 256)) * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+
+def connect(db_path, factory=sqlite3.Connection, check_same_thread=True):
+    conn = sqlite3.connect(db_path, factory=factory, check_same_thread=check_same_thread)
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3.Connection whose close() returns it to its ConnectionPool."""
+
+    pool = None
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+
+class ConnectionPool:
+    def __init__(self, db_path="users.db", size=int(os.getenv("SQLITE_POOL_SIZE", 8)), timeout=30):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        # LIFO keeps the most recently used (warmest page cache) connections busy.
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self.checkouts = 0
+        self.waits = 0
+
+    def _open(self):
+        conn = connect(self.db_path, factory=PooledConnection, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.pool = self
+        return conn
+
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._created < self.size
+                if grow:
+                    self._created += 1
+            if grow:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                with self._lock:
+                    self.waits += 1
+                conn = self._idle.get(timeout=self.timeout)
+        with self._lock:
+            self.checkouts += 1
+        return conn
+
+    def release(self, conn):
+        # Never hand the next borrower a half-finished transaction.
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.pool = None
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": self._created,
+                "idle": self._idle.qsize(),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+            }
@@ -0,0 +1,110 @@
+"""Compact on-disk format for cases.embedding.
+
+A stored vector is an 8-byte header followed by the raw little-endian values:
+
+    b"EV" | version (u8) | dtype code (u8) | dimension (u32)
+
+Rows written before this format existed hold `json.dumps(vector)` text;
+decode_embedding() still reads those, and `python embedding_store.py migrate`
+rewrites them in place.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b"EV"
+VERSION = 1
+HEADER = struct.Struct("<2sBBI")
+DTYPES = {1: np.dtype("<f4"), 2: np.dtype("<f2")}
+DTYPE_CODES = {"float32": 1, "float16": 2}
+DEFAULT_DTYPE = os.getenv("EMBEDDING_DTYPE", "float32")
+
+
+def encode_embedding(vector, dtype=DEFAULT_DTYPE):
+    """Packs a vector into the binary format. Empty vectors are stored as NULL."""
+    if vector is None or len(vector) == 0:
+        return None
+    code = DTYPE_CODES[dtype]
+    values = np.asarray(vector, dtype=DTYPES[code])
+    return HEADER.pack(MAGIC, VERSION, code, values.size) + values.tobytes()
+
+
+def decode_embedding(raw):
+    """Turns a stored embedding (binary or legacy JSON) into a float32 vector, or None."""
+    if not raw:
+        return None
+    if isinstance(raw, (bytes, memoryview)):
+        raw = bytes(raw)
+        if len(raw) < HEADER.size:
+            return None
+        magic, version, code, dim = HEADER.unpack_from(raw)
+        if magic != MAGIC or version != VERSION or code not in DTYPES:
+            return None
+        dtype = DTYPES[code]
+        if len(raw) != HEADER.size + dim * dtype.itemsize:
+            return None
+        vec = np.frombuffer(raw, dtype=dtype, offset=HEADER.size).astype(np.float32)
+    else:
+        try:
+            vec = np.asarray(json.loads(raw), dtype=np.float32)
+        except (TypeError, ValueError):
+            return None
+    if vec.ndim != 1 or vec.size == 0:
+        return None
+    return vec
+
+
+def _time_index_load(db_path):
+    from case_index import CaseIndex
+
+    conn = sqlite3.connect(db_path)
+    start = time.perf_counter()
+    n = CaseIndex().refresh(conn)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return n, elapsed
+
+
+def migrate(db_path="users.db", dtype=DEFAULT_DTYPE, batch_size=500):
+    """Rewrites JSON-text embeddings in `db_path` to the binary format, in place."""
+    size_before = os.path.getsize(db_path)
+    n_before, load_before = _time_index_load(db_path)
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT id, embedding FROM cases WHERE typeof(embedding) = 'text'").fetchall()
+    converted = 0
+    for start in range(0, len(rows), batch_size):
+        updates = []
+        for row_id, raw in rows[start:start + batch_size]:
+            vec = decode_embedding(raw)
+            updates.append((encode_embedding(vec, dtype) if vec is not None else None, row_id))
+        conn.executemany("UPDATE cases SET embedding = ? WHERE id = ?", updates)
+        conn.commit()
+        converted += len(updates)
+    conn.execute("VACUUM")
+    conn.close()
+
+    size_after = os.path.getsize(db_path)
+    n_after, load_after = _time_index_load(db_path)
+
+    print(f"Converted {converted} embeddings to {dtype}.")
+    print(f"Database size: {size_before / 1024:.0f} KiB -> {size_after / 1024:.0f} KiB")
+    print(f"Index load:    {load_before * 1000:.1f} ms ({n_before} rows) -> {load_after * 1000:.1f} ms ({n_after} rows)")
+    return converted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate_cmd = sub.add_parser("migrate", help="convert JSON embeddings in place")
+    migrate_cmd.add_argument("--db", default="users.db")
+    migrate_cmd.add_argument("--dtype", choices=sorted(DTYPE_CODES), default=DEFAULT_DTYPE)
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        migrate(args.db, args.dtype)
@@ -0,0 +1,271 @@
+"""Thread-safe pool of Gemini clients, one per API key.
+
+genai.configure() swaps a module-global key, so calling it from worker
+threads races. GeminiPool instead holds one client per GEMINI_API_KEY1..N,
+and each call goes through these steps:
+
+- picks the least-loaded key that has a rate-limit token available
+  (a per-key token bucket sized by GEMINI_RPM),
+- retries 429/5xx errors with jittered exponential backoff, cooling
+  down the key that was throttled,
+- records per-key call, error and latency metrics.
+
+Set GEMINI_BACKEND=fake to run against FakeBackend, a deterministic
+local stand-in that needs no network or keys.
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class BackendError(Exception):
+    """Error raised by a backend, carrying the HTTP-style status code."""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+def error_status(error):
+    code = getattr(error, "code", None)
+    if code is None:
+        code = getattr(error, "status_code", None)
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    return error_status(error) in RETRYABLE_STATUS or isinstance(error, (TimeoutError, ConnectionError))
+
+
+def model_path(model):
+    return model if model.startswith("models/") else f"models/{model}"
+
+
+class GenAIBackend:
+    """A Gemini API client bound to a single key."""
+
+    def __init__(self, api_key, timeout=30):
+        self.api_key = api_key
+        self.timeout = timeout
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from google.ai import generativelanguage as glm
+
+            if not self.api_key:
+                raise BackendError("No Gemini API key configured", code=401)
+            self._client = glm.GenerativeServiceClient(client_options={"api_key": self.api_key})
+        return self._client
+
+    def generate(self, model, prompt):
+        from google.ai import generativelanguage as glm
+
+        response = self._get_client().generate_content(
+            model=model_path(model),
+            contents=[glm.Content(parts=[glm.Part(text=prompt)])],
+            retry=None,
+            timeout=self.timeout,
+        )
+        if not response.candidates:
+            raise ValueError(f"No candidates returned: {response.prompt_feedback}")
+        return "".join(part.text for part in response.candidates[0].content.parts)
+
+    def embed(self, model, texts, task_type):
+        from google.ai import generativelanguage as glm
+
+        model = model_path(model)
+        response = self._get_client().batch_embed_contents(
+            model=model,
+            requests=[
+                glm.EmbedContentRequest(model=model, content=glm.Content(parts=[glm.Part(text=text)]), task_type=task_type)
+                for text in texts
+            ],
+            retry=None,
+            timeout=self.timeout,
+        )
+        return [list(embedding.values) for embedding in response.embeddings]
+
+
+class FakeBackend:
+    """Deterministic offline backend: hash-seeded embeddings and canned text."""
+
+    def __init__(self, dim=768, latency=0.0, failures=None, reply=None):
+        self.dim = dim
+        self.latency = latency
+        # Status codes to raise, one per call, before succeeding (e.g. [429, 503]).
+        self.failures = list(failures or [])
+        self.reply = reply
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+            failure = self.failures.pop(0) if self.failures else None
+        if self.latency:
+            time.sleep(self.latency)
+        if failure:
+            raise BackendError(f"fake backend error {failure}", code=failure)
+
+    def generate(self, model, prompt):
+        self._call()
+        if self.reply:
+            return self.reply(prompt)
+        return f"Summary: {' '.join(prompt.split())[:200]}"
+
+    def embed(self, model, texts, task_type):
+        self._call()
+        vectors = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(f"{task_type}:{text}".encode("utf-8")).digest()[:8], "little")
+            vectors.append(np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32).tolist())
+        return vectors
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class KeySlot:
+    def __init__(self, name, backend, bucket):
+        self.name = name
+        self.backend = backend
+        self.bucket = bucket
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.calls = 0
+        self.errors = 0
+        self.throttled = 0
+        self.total_latency = 0.0
+
+    def metrics(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "in_flight": self.in_flight,
+            "avg_latency_ms": round(self.total_latency / self.calls * 1000, 1) if self.calls else None,
+        }
+
+
+class GeminiPool:
+    def __init__(self, backends, rpm=60, max_retries=4, base_delay=0.5, max_delay=16.0):
+        """`backends` maps a display name (e.g. "key1") to a backend instance."""
+        if not backends:
+            raise ValueError("GeminiPool needs at least one backend")
+        self._lock = threading.Condition()
+        self.slots = [KeySlot(name, backend, TokenBucket(rpm / 60.0, max(1, rpm // 6))) for name, backend in backends.items()]
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_env(cls):
+        keys = []
+        i = 1
+        while os.getenv(f"GEMINI_API_KEY{i}"):
+            keys.append(os.getenv(f"GEMINI_API_KEY{i}"))
+            i += 1
+        rpm = int(os.getenv("GEMINI_RPM", 60))
+        if os.getenv("GEMINI_BACKEND") == "fake":
+            return cls({f"fake{i + 1}": FakeBackend() for i in range(max(1, len(keys)))}, rpm=rpm)
+        if not keys:
+            print("WARNING: no GEMINI_API_KEY1..N found in .env file. AI features will fail.")
+            return cls({"missing": GenAIBackend(None)}, rpm=rpm)
+        return cls({f"key{i + 1}": GenAIBackend(key) for i, key in enumerate(keys)}, rpm=rpm)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _acquire(self):
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                ready = []
+                soonest = None
+                for slot in self.slots:
+                    wait = max(slot.bucket.wait_time(now), slot.cooldown_until - now)
+                    if wait <= 0:
+                        ready.append(slot)
+                    elif soonest is None or wait < soonest:
+                        soonest = wait
+                if ready:
+                    slot = min(ready, key=lambda s: (s.in_flight, -s.bucket.tokens))
+                    slot.bucket.take()
+                    slot.in_flight += 1
+                    return slot
+                self._lock.wait(timeout=soonest)
+
+    def _release(self, slot, latency, error=None):
+        with self._lock:
+            slot.in_flight -= 1
+            slot.calls += 1
+            slot.total_latency += latency
+            if error is not None:
+                slot.errors += 1
+                if error_status(error) == 429:
+                    slot.throttled += 1
+            self._lock.notify_all()
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, method, *args):
+        """Runs backend.<method>(*args) on the best available key, retrying transient errors."""
+        attempt = 0
+        while True:
+            slot = self._acquire()
+            start = time.monotonic()
+            try:
+                result = getattr(slot.backend, method)(*args)
+            except Exception as e:
+                self._release(slot, time.monotonic() - start, e)
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                if error_status(e) == 429:
+                    # Park the throttled key; other keys can take the retry.
+                    with self._lock:
+                        slot.cooldown_until = time.monotonic() + max(delay, self.base_delay)
+                else:
+                    time.sleep(delay)
+                attempt += 1
+                continue
+            self._release(slot, time.monotonic() - start)
+            return result
+
+    def generate(self, model, prompt):
+        return self.call("generate", model, prompt)
+
+    def embed(self, model, texts, task_type):
+        return self.call("embed", model, list(texts), task_type)
+
+    def metrics(self):
+        with self._lock:
+            return {slot.name: slot.metrics() for slot in self.slots}
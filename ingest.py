@@ -0,0 +1,157 @@
+"""Embeds merged_scraped_data.csv into the cases table.
+
+Rows are embedded in batches, with batches spread across worker threads
+that share one GeminiPool (and so every configured API key). Each chunk
+of rows is committed as it finishes, and each row stores a SHA-256 of the
+text that was embedded. Re-running the script therefore resumes where it
+stopped and skips rows that are already in the database. A row whose hash
+is stored but whose embedding is missing or unreadable is embedded again
+and its embedding updated in place.
+
+    python ingest.py [--csv merged_scraped_data.csv] [--db users.db] [--fake]
+"""
+import argparse
+import concurrent.futures
+import hashlib
+import sqlite3
+import time
+
+import pandas as pd
+
+from embedding_store import decode_embedding, encode_embedding
+from gemini_pool import FakeBackend, GeminiPool
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+
+
+def content_text(title, snippet):
+    """The text embedded for a case; also what content_hash is computed over."""
+    return f"{title or ''} {snippet or ''}"
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def ensure_schema(conn):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(cases)")}
+    if "content_hash" not in columns:
+        conn.execute("ALTER TABLE cases ADD COLUMN content_hash TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cases_content_hash ON cases(content_hash)")
+    # Rows inserted before content_hash existed get it from the same fields.
+    rows = conn.execute("SELECT id, case_title, snippet FROM cases WHERE content_hash IS NULL").fetchall()
+    conn.executemany(
+        "UPDATE cases SET content_hash = ? WHERE id = ?",
+        [(content_hash(content_text(title, snippet)), row_id) for row_id, title, snippet in rows],
+    )
+
+
+def read_records(csv_path):
+    df = pd.read_csv(csv_path)
+    df = df.astype(object).where(pd.notnull(df), None)
+    return df.to_dict(orient="records")
+
+
+def embed_batch(pool, texts):
+    return pool.embed(EMBEDDING_MODEL, texts, "RETRIEVAL_DOCUMENT")
+
+
+def ingest_csv(csv_path, db_path, pool, batch_size=50, chunk_size=500, workers=None):
+    """Embeds and inserts every CSV row not already in `cases`, re-embedding stored rows that lack a usable embedding.
+
+    Returns a stats dict.
+    """
+    start = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    with conn:
+        ensure_schema(conn)
+    # Only a row with a usable embedding counts as done; the others are re-embedded in place.
+    seen = set()
+    missing = set()
+    for digest, raw in conn.execute("SELECT content_hash, embedding FROM cases WHERE content_hash IS NOT NULL"):
+        if decode_embedding(raw) is not None:
+            seen.add(digest)
+        else:
+            missing.add(digest)
+    missing -= seen
+
+    pending = []
+    skipped = 0
+    for row in read_records(csv_path):
+        text = content_text(row.get("title"), row.get("snippet"))
+        digest = content_hash(text)
+        if digest in seen:
+            skipped += 1
+            continue
+        seen.add(digest)
+        pending.append((row, text, digest))
+
+    inserted = 0
+    updated = 0
+    failed = 0
+    workers = workers or max(1, len(pool))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for chunk_start in range(0, len(pending), chunk_size):
+            chunk = pending[chunk_start:chunk_start + chunk_size]
+            batches = [chunk[i:i + batch_size] for i in range(0, len(chunk), batch_size)]
+            futures = [executor.submit(embed_batch, pool, [text for _, text, _ in batch]) for batch in batches]
+
+            values = []
+            repairs = []
+            for batch, future in zip(batches, futures):
+                try:
+                    vectors = future.result()
+                except Exception as e:
+                    print(f"Embedding Error: {e} ({len(batch)} rows will be retried on the next run)")
+                    failed += len(batch)
+                    continue
+                for (row, _, digest), vector in zip(batch, vectors):
+                    if digest in missing:
+                        repairs.append((encode_embedding(vector), digest))
+                        continue
+                    values.append((row.get("title"), row.get("citation"), row.get("coram"), row.get("decision_date"),
+                                   row.get("case_no"), row.get("bench"), row.get("pdf_path_or_url"),
+                                   row.get("snippet"), encode_embedding(vector), digest))
+
+            with conn:
+                conn.executemany('''INSERT INTO cases (case_title, citation, judges, judgement_date, case_id, bench, pdf_path, snippet, embedding, content_hash)
+                                    VALUES (?,?,?,?,?,?,?,?,?,?)''', values)
+                conn.executemany("UPDATE cases SET embedding = ? WHERE content_hash = ?", repairs)
+            inserted += len(values)
+            updated += len(repairs)
+            elapsed = time.perf_counter() - start
+            print(f"Ingested {inserted + updated}/{len(pending)} rows: {inserted} new, {updated} re-embedded "
+                  f"({(inserted + updated) / elapsed:.1f} rows/s)")
+
+    conn.close()
+    elapsed = time.perf_counter() - start
+    stats = {
+        "inserted": inserted,
+        "updated": updated,
+        "skipped": skipped,
+        "failed": failed,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round((inserted + updated) / elapsed, 1) if elapsed else 0.0,
+    }
+    print(f"Ingestion done: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed the scraped cases CSV into users.db")
+    parser.add_argument("--csv", default="merged_scraped_data.csv")
+    parser.add_argument("--db", default="users.db")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--fake", action="store_true", help="use the deterministic offline embedder")
+    args = parser.parse_args()
+
+    if args.fake:
+        pool = GeminiPool({"fake": FakeBackend()}, rpm=60000)
+    else:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        pool = GeminiPool.from_env()
+    ingest_csv(args.csv, args.db, pool, args.batch_size, args.chunk_size, args.workers)
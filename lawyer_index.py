@@ -0,0 +1,188 @@
+"""In-memory search over the lawyers table for /lawyers and /lawyers/autocomplete.
+
+The lawyers table is small and only changes when lawyers.csv is reloaded,
+so LawyerIndex keeps every row in memory and rebuilds when data_loads
+records a newer load, whichever process made it. It holds an inverted index from
+lowercased word tokens to lawyer ids, with the tokens kept sorted so a
+prefix lookup is a bisect. Every query token is matched as a prefix
+("div" finds "Divorce"), and results come back in rating order. A practice
+area chosen from a facet is an exact (case-insensitive) filter applied on top
+of the query and city. Facet counts per city and per practice area are
+computed over the matching set.
+Autocomplete suggestions are served from a second sorted list with one
+entry per word start of each name, practice area, city and state.
+"""
+import bisect
+import re
+import threading
+
+from lawyer_store import latest_load_id, split_practice_areas
+
+TOKEN = re.compile(r"\w+")
+SEARCH_FIELDS = ("name", "specialization", "city", "state")
+LOCATION_FIELDS = ("city", "state")
+
+
+def tokens(text):
+    return TOKEN.findall(str(text or "").lower())
+
+
+class _PrefixIndex:
+    def __init__(self):
+        self.postings = {}
+        self.keys = []
+
+    def add(self, text, lawyer_id):
+        for token in tokens(text):
+            self.postings.setdefault(token, set()).add(lawyer_id)
+
+    def freeze(self):
+        self.keys = sorted(self.postings)
+
+    def lookup(self, prefix):
+        """Ids of lawyers with a token starting with `prefix`."""
+        ids = set()
+        i = bisect.bisect_left(self.keys, prefix)
+        while i < len(self.keys) and self.keys[i].startswith(prefix):
+            ids |= self.postings[self.keys[i]]
+            i += 1
+        return ids
+
+
+class LawyerIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.loaded = False
+        self.load_id = None
+        self._build([])
+
+    def __len__(self):
+        return len(self.lawyers)
+
+    def _build(self, rows):
+        lawyers = {}
+        text_index = _PrefixIndex()
+        location_index = _PrefixIndex()
+        area_index = {}
+        suggestions = {}
+        for row in rows:
+            lawyer = dict(row)
+            lawyer["practice_areas"] = split_practice_areas(lawyer.get("specialization"))
+            lawyers[lawyer["id"]] = lawyer
+            for field in SEARCH_FIELDS:
+                text_index.add(lawyer.get(field), lawyer["id"])
+            for field in LOCATION_FIELDS:
+                location_index.add(lawyer.get(field), lawyer["id"])
+            for area in lawyer["practice_areas"]:
+                area_index.setdefault(area.lower(), set()).add(lawyer["id"])
+            for kind, label in [("lawyer", lawyer.get("name")), ("city", lawyer.get("city")), ("state", lawyer.get("state"))] + \
+                               [("practice_area", area) for area in lawyer["practice_areas"]]:
+                if label:
+                    entry = suggestions.setdefault((kind, label), [label, kind, 0])
+                    entry[2] += 1
+        text_index.freeze()
+        location_index.freeze()
+
+        completions = []
+        for label, kind, count in suggestions.values():
+            words = tokens(label)
+            for i in range(len(words)):
+                completions.append((" ".join(words[i:]), -count, label, kind))
+        completions.sort()
+
+        # Swap everything at once so concurrent readers see either the old or the new index.
+        order = sorted(lawyers, key=lambda i: (-(lawyers[i].get("rating") or 0), lawyers[i].get("name") or ""))
+        with self._lock:
+            self.lawyers = lawyers
+            self.order = order
+            self.text_index = text_index
+            self.location_index = location_index
+            self.area_index = area_index
+            self.completions = completions
+            self.completion_keys = [c[0] for c in completions]
+
+    def refresh(self, conn):
+        """Rebuilds from the lawyers table. Returns the number of lawyers indexed."""
+        with self._refresh_lock:
+            # Read the load id first: a reload in between leaves it stale, which costs one extra rebuild.
+            load_id = latest_load_id(conn)
+            rows = conn.execute("SELECT * FROM lawyers").fetchall()
+            self._build(rows)
+            self.load_id = load_id
+            self.loaded = True
+            return len(rows)
+
+    def refresh_if_reloaded(self, conn):
+        """Rebuilds if the lawyers were loaded since the last refresh. Returns True if it rebuilt."""
+        if self.loaded and latest_load_id(conn) == self.load_id:
+            return False
+        self.refresh(conn)
+        return True
+
+    def _match(self, index, text):
+        matched = None
+        for token in tokens(text):
+            ids = index.lookup(token)
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                break
+        return matched
+
+    def search(self, query="", city="", page=1, per_page=12, area=""):
+        """Returns {"lawyers", "total", "page", "pages", "facets"} for one page, best rated first."""
+        with self._lock:
+            lawyers, order = self.lawyers, self.order
+            text_index, location_index, area_index = self.text_index, self.location_index, self.area_index
+
+        matched = None
+        for index, text in ((text_index, query), (location_index, city)):
+            ids = self._match(index, text)
+            if ids is not None:
+                matched = ids if matched is None else matched & ids
+        area = " ".join(str(area or "").split()).lower()
+        if area:
+            ids = area_index.get(area, set())
+            matched = ids if matched is None else matched & ids
+
+        ranked = order if matched is None else [i for i in order if i in matched]
+        total = len(ranked)
+        pages = max(1, -(-total // per_page))
+        page = min(max(page, 1), pages)
+        start = (page - 1) * per_page
+
+        cities = {}
+        areas = {}
+        for lawyer_id in ranked:
+            lawyer = lawyers[lawyer_id]
+            if lawyer.get("city"):
+                cities[lawyer["city"]] = cities.get(lawyer["city"], 0) + 1
+            for area in lawyer["practice_areas"]:
+                areas[area] = areas.get(area, 0) + 1
+
+        def top(counts):
+            return sorted(counts.items(), key=lambda x: (-x[1], x[0]))
+
+        return {
+            "lawyers": [lawyers[i] for i in ranked[start:start + per_page]],
+            "total": total,
+            "page": page,
+            "pages": pages,
+            "facets": {"city": top(cities), "practice_area": top(areas)},
+        }
+
+    def autocomplete(self, prefix, limit=8):
+        """[{"label", "kind", "count"}, ...] whose words start with `prefix`, most common first."""
+        prefix = " ".join(tokens(prefix))
+        if not prefix:
+            return []
+        with self._lock:
+            completions, keys = self.completions, self.completion_keys
+        seen = {}
+        i = bisect.bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix):
+            _, neg_count, label, kind = completions[i]
+            if (kind, label) not in seen:
+                seen[(kind, label)] = {"label": label, "kind": kind, "count": -neg_count}
+            i += 1
+        return sorted(seen.values(), key=lambda s: (-s["count"], s["label"]))[:limit]
@@ -0,0 +1,223 @@
+"""Typed, normalized storage for the lawyers scraped into lawyers.csv.
+
+The CSV keeps practice areas as one comma-joined string, and rating and
+experience as text ("4.7", "19 years", "N/A"). The loaders turn the
+ratings into REAL and the experience into an integer year count. They also
+split specialization into the practice_areas vocabulary and the
+lawyer_practice_areas join table (see migration 7). A suggestion is then an
+indexed equality join that reads lawyers in numeric rating order.
+
+load_lawyers_csv() is idempotent. It skips the load when the CSV's checksum
+matches the last one recorded in data_loads. Otherwise it upserts on url in
+one transaction, or with shadow=True it builds lawyers_shadow and renames it
+into place. Every load adds a data_loads row, so other processes can see that
+the lawyers changed from latest_load_id():
+
+    python lawyer_store.py [--csv lawyers.csv] [--db users.db] [--shadow] [--force]
+"""
+import argparse
+import hashlib
+import re
+import sqlite3
+
+import pandas as pd
+
+YEARS = re.compile(r"(\d+)")
+LAWYER_COLUMNS = ("name", "url", "image_url", "city", "state", "address", "specialization", "experience", "rating")
+
+
+def parse_rating(value):
+    try:
+        rating = float(value)
+    except (TypeError, ValueError):
+        return None
+    return rating if rating == rating else None  # NaN
+
+
+def parse_experience(value):
+    """'19 years' -> 19; 'N/A' or blank -> None."""
+    if isinstance(value, (int, float)):
+        return int(value) if value == value else None
+    match = YEARS.search(str(value or ""))
+    return int(match.group(1)) if match else None
+
+
+def split_practice_areas(specialization):
+    seen = {}
+    for area in str(specialization or "").split(","):
+        area = " ".join(area.split())
+        if area and area.lower() not in seen:
+            seen[area.lower()] = area
+    return list(seen.values())
+
+
+def practice_area_ids(conn, names):
+    """Returns {lowercased name: id}, inserting names not yet in the vocabulary."""
+    conn.executemany("INSERT OR IGNORE INTO practice_areas (name) VALUES (?)", [(name,) for name in names])
+    return {name.lower(): area_id for area_id, name in conn.execute("SELECT id, name FROM practice_areas")}
+
+
+def lawyer_values(records):
+    """Typed INSERT values keyed by url (the last record for a url wins), plus each url's practice areas."""
+    values = {}
+    areas = {}
+    for row in records:
+        url = row.get("url")
+        if not url:
+            continue
+        row_areas = split_practice_areas(row.get("specialization"))
+        values[url] = (row.get("name"), url, row.get("image_url"), row.get("city"), row.get("state"), row.get("address"),
+                       ", ".join(row_areas), parse_experience(row.get("experience")), parse_rating(row.get("rating")))
+        areas[url] = row_areas
+    return values, areas
+
+
+def _write_links(conn, lawyers_table, links_table, areas):
+    area_ids = practice_area_ids(conn, {area for row_areas in areas.values() for area in row_areas})
+    links = []
+    for url, lawyer_id, rating in conn.execute(f"SELECT url, id, rating FROM {lawyers_table}"):
+        links.extend((lawyer_id, area_ids[area.lower()], rating) for area in areas.get(url, ()))
+    conn.execute(f"DELETE FROM {links_table}")
+    conn.executemany(f"INSERT OR IGNORE INTO {links_table} (lawyer_id, practice_area_id, rating) VALUES (?, ?, ?)", links)
+
+
+def upsert_lawyers(conn, records):
+    """Makes lawyers match `records` in one transaction, keyed on url. Returns counts."""
+    values, areas = lawyer_values(records)
+    with conn:
+        existing = {url for url, in conn.execute("SELECT url FROM lawyers")}
+        conn.executemany(f'''INSERT INTO lawyers ({", ".join(LAWYER_COLUMNS)}) VALUES ({",".join("?" * len(LAWYER_COLUMNS))})
+                             ON CONFLICT(url) DO UPDATE SET {", ".join(f"{c} = excluded.{c}" for c in LAWYER_COLUMNS if c != "url")}''',
+                         list(values.values()))
+        removed = existing - values.keys()
+        conn.executemany("DELETE FROM lawyers WHERE url = ?", [(url,) for url in removed])
+        _write_links(conn, "lawyers", "lawyer_practice_areas", areas)
+    return {"inserted": len(values.keys() - existing), "updated": len(values.keys() & existing), "deleted": len(removed)}
+
+
+def _shadow_ddl(conn, table):
+    sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()[0]
+    # Only the table's own name is replaced; REFERENCES lawyers(id) must keep pointing at the live name.
+    return re.sub(rf'^CREATE TABLE\s+"?{table}"?', f"CREATE TABLE {table}_shadow", sql, count=1)
+
+
+def swap_in_lawyers(conn, records, batch_size=1000):
+    """Reloads lawyers by filling lawyers_shadow and renaming it into place.
+
+    The shadow tables are filled in batches, each its own short transaction.
+    Live /lawyers reads keep seeing the old rows until one final transaction
+    renames the tables and rebuilds their indexes. Lawyer ids are
+    reassigned, and only lawyer_practice_areas refers to them, which is
+    swapped along with the lawyers table.
+    """
+    values, areas = lawyer_values(records)
+    tables = ("lawyers", "lawyer_practice_areas")
+    indexes = conn.execute(
+        f"SELECT sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN {tables}"
+    ).fetchall()
+    with conn:
+        for table in tables:
+            conn.execute(f"DROP TABLE IF EXISTS {table}_shadow")
+            conn.execute(_shadow_ddl(conn, table))
+    rows = list(values.values())
+    for start in range(0, len(rows), batch_size):
+        with conn:
+            conn.executemany(f"INSERT INTO lawyers_shadow ({', '.join(LAWYER_COLUMNS)}) VALUES ({','.join('?' * len(LAWYER_COLUMNS))})",
+                             rows[start:start + batch_size])
+    with conn:
+        _write_links(conn, "lawyers_shadow", "lawyer_practice_areas_shadow", areas)
+
+    # Without legacy_alter_table, renaming lawyers would rewrite the REFERENCES in the shadow join table.
+    conn.execute("PRAGMA legacy_alter_table = ON")
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for table in tables:
+            conn.execute(f"DROP TABLE {table}")
+            conn.execute(f"ALTER TABLE {table}_shadow RENAME TO {table}")
+        for (sql,) in indexes:
+            conn.execute(sql)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute("PRAGMA legacy_alter_table = OFF")
+    return {"inserted": len(rows), "updated": 0, "deleted": 0}
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_lawyers_csv(conn, csv_path="lawyers.csv", shadow=False, force=False):
+    """Loads lawyers.csv unless its checksum matches the last load. Returns a stats dict."""
+    checksum = file_checksum(csv_path)
+    previous = conn.execute("SELECT checksum FROM data_loads WHERE source = ? ORDER BY id DESC LIMIT 1",
+                            (csv_path,)).fetchone()
+    if previous and previous[0] == checksum and not force:
+        return {"skipped": True, "checksum": checksum}
+
+    df = pd.read_csv(csv_path)
+    records = df.astype(object).where(pd.notnull(df), None).to_dict(orient="records")
+    stats = swap_in_lawyers(conn, records) if shadow else upsert_lawyers(conn, records)
+    with conn:
+        conn.execute("INSERT INTO data_loads (source, checksum, rows) VALUES (?, ?, ?)",
+                     (csv_path, checksum, len(records)))
+    return {"skipped": False, "checksum": checksum, "rows": len(records), **stats}
+
+
+LATEST_LOAD_SQL = "SELECT MAX(id) FROM data_loads"
+
+
+def latest_load_id(conn):
+    """Id of the newest data_loads row; it changes whenever any process reloads the lawyers."""
+    return conn.execute(LATEST_LOAD_SQL).fetchone()[0]
+
+
+TOP_RATED_LAWYERS_SQL = "SELECT * FROM lawyers ORDER BY rating DESC LIMIT ?"
+PRACTICE_AREA_LAWYERS_SQL = '''SELECT l.* FROM lawyer_practice_areas lp JOIN lawyers l ON l.id = lp.lawyer_id
+                               WHERE lp.practice_area_id = (SELECT id FROM practice_areas WHERE name = ?)
+                               ORDER BY lp.rating DESC LIMIT ?'''
+PRACTICE_AREA_LIKE_LAWYERS_SQL = '''SELECT * FROM lawyers WHERE id IN (
+                                        SELECT lp.lawyer_id FROM practice_areas p
+                                        JOIN lawyer_practice_areas lp ON lp.practice_area_id = p.id
+                                        WHERE p.name LIKE ?)
+                                    ORDER BY rating DESC LIMIT ?'''
+
+
+def lawyers_for_practice_area(conn, practice_area, limit=10):
+    """Top-rated lawyers practising `practice_area`.
+
+    An exact (case-insensitive) vocabulary match is an indexed equality join.
+    Otherwise areas whose name contains the term are used, which only scans
+    the small practice_areas table. An empty term returns the top-rated
+    lawyers overall.
+    """
+    practice_area = " ".join(str(practice_area or "").split())
+    if not practice_area:
+        return conn.execute(TOP_RATED_LAWYERS_SQL, (limit,)).fetchall()
+
+    rows = conn.execute(PRACTICE_AREA_LAWYERS_SQL, (practice_area, limit)).fetchall()
+    if rows:
+        return rows
+    return conn.execute(PRACTICE_AREA_LIKE_LAWYERS_SQL, (f"%{practice_area}%", limit)).fetchall()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load lawyers.csv into users.db")
+    parser.add_argument("--csv", default="lawyers.csv")
+    parser.add_argument("--db", default="users.db")
+    parser.add_argument("--shadow", action="store_true", help="fill a shadow table and swap it in")
+    parser.add_argument("--force", action="store_true", help="reload even if the CSV is unchanged")
+    args = parser.parse_args()
+
+    from migrations import migrate
+
+    conn = sqlite3.connect(args.db)
+    migrate(conn)
+    print(load_lawyers_csv(conn, args.csv, args.shadow, args.force))
+    conn.close()
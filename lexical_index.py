@@ -0,0 +1,102 @@
+"""BM25 search over cases with SQLite FTS5, plus rank fusion with the vector index.
+
+cases_fts is an external-content FTS5 table over cases, kept in sync by
+triggers, so rows added by ingest.py are searchable as soon as they
+commit. Queries that look like a citation or case number are answered
+from FTS alone (see is_identifier_query); everything else fuses the BM25
+and cosine rankings with reciprocal-rank fusion.
+"""
+import re
+import sqlite3
+
+from migrations import execute_script
+
+FTS_COLUMNS = ("case_title", "citation", "case_id", "judges", "snippet")
+# bm25() weights, in FTS_COLUMNS order: identifiers outrank body text.
+FTS_WEIGHTS = (5.0, 10.0, 10.0, 2.0, 1.0)
+# Ranking through the hidden rank column lets FTS5 return matches already in
+# bm25 order, where ORDER BY bm25(...) would sort them in a temp b-tree.
+LEXICAL_SEARCH_SQL = (
+    "SELECT rowid, rank FROM cases_fts WHERE cases_fts MATCH ? "
+    f"AND rank MATCH 'bm25({', '.join(str(w) for w in FTS_WEIGHTS)})' ORDER BY rank LIMIT ? OFFSET ?"
+)
+LEXICAL_COUNT_SQL = "SELECT count(*) FROM cases_fts WHERE cases_fts MATCH ?"
+
+IDENTIFIER_PATTERNS = [
+    re.compile(r"\[\s*\d{4}\s*\]\s*\d+\s*S\.?\s*C\.?\s*R\b", re.IGNORECASE),  # [2025] 10 S.C.R. 572
+    re.compile(r"\b\d{4}\s+INSC\s+\d+", re.IGNORECASE),  # 2025 INSC 328
+    re.compile(r"\b(?:CRIMINAL|CIVIL|WRIT|TRANSFER)\s+(?:APPEAL|PETITION)\b.*?\bNo\.?\s*\d+", re.IGNORECASE),
+    re.compile(r"\bSPECIAL\s+LEAVE\s+PETITION\b.*?\bNo\.?\s*\d+", re.IGNORECASE),
+]
+WORD = re.compile(r"\w+")
+
+
+def ensure_schema(conn):
+    """Creates cases_fts and its triggers. The caller commits (migrate() runs it in its transaction)."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'cases_fts'").fetchone()
+    columns = ", ".join(FTS_COLUMNS)
+    new_values = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    old_values = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+    execute_script(conn, f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5({columns}, content='cases', content_rowid='id');
+        CREATE TRIGGER IF NOT EXISTS cases_fts_insert AFTER INSERT ON cases BEGIN
+            INSERT INTO cases_fts(rowid, {columns}) VALUES (new.id, {new_values});
+        END;
+        CREATE TRIGGER IF NOT EXISTS cases_fts_delete AFTER DELETE ON cases BEGIN
+            INSERT INTO cases_fts(cases_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END;
+        -- Only edits to indexed columns touch the index; embedding or content_hash updates don't.
+        CREATE TRIGGER IF NOT EXISTS cases_fts_update AFTER UPDATE OF {columns} ON cases BEGIN
+            INSERT INTO cases_fts(cases_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO cases_fts(rowid, {columns}) VALUES (new.id, {new_values});
+        END;
+    ''')
+    if not exists:
+        conn.execute("INSERT INTO cases_fts(cases_fts) VALUES ('rebuild')")
+
+
+def is_identifier_query(query):
+    """True for citations / case numbers, which exact token matching answers best."""
+    return any(p.search(query) for p in IDENTIFIER_PATTERNS)
+
+
+def fts_query(query, phrase=False):
+    """Builds a safe MATCH expression.
+
+    Each whitespace-separated word becomes a quoted phrase of its word
+    characters, so "s.302" matches the adjacent tokens "s" "302". With
+    phrase=True the whole query must appear in order.
+    """
+    if phrase:
+        tokens = WORD.findall(query)
+        return f'"{" ".join(tokens)}"' if tokens else ""
+    parts = []
+    for word in query.split():
+        tokens = WORD.findall(word)
+        if tokens:
+            parts.append(f'"{" ".join(tokens)}"')
+    return " OR ".join(parts)
+
+
+def lexical_search(conn, query, start, stop, phrase=False):
+    """Returns ([(score, case_id), ...] for ranks start..stop-1, total match count)."""
+    match = fts_query(query, phrase)
+    if not match or stop <= start:
+        return [], 0
+    try:
+        rows = conn.execute(LEXICAL_SEARCH_SQL, (match, stop - start, max(start, 0))).fetchall()
+        total = conn.execute(LEXICAL_COUNT_SQL, (match,)).fetchone()[0]
+    except sqlite3.OperationalError as e:
+        print(f"Lexical Search Error: {e}")
+        return [], 0
+    # bm25() is lower-is-better; flip it so callers can treat it like a similarity.
+    return [(-rank, row_id) for row_id, rank in rows], total
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuses ranked id lists into [(score, id), ...], best first."""
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(((score, item) for item, score in scores.items()), key=lambda x: x[0], reverse=True)
@@ -1,22 +1,129 @@
+import argparse
+import json
+import os
 import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import fitz
 import pandas as pd
 
 CSV_PATH = pathlib.Path("./csv")
 PROJECT_ROOT_DIR = pathlib.Path(__file__).parent
+# Snippets already extracted, keyed by PDF path and invalidated by mtime/size.
+CACHE_PATH = PROJECT_ROOT_DIR / ".pdf_extract_cache.json"
 
 
-if __name__ == "__main__":
-    merged_csv = pd.DataFrame()
-    for csv in CSV_PATH.iterdir():
-        if csv.is_file():
-            merged_csv = pd.concat(
-                [merged_csv, pd.read_csv(csv)],
-                axis=0,
-                ignore_index=True,
-            )
+def resolve_pdf(path):
+    """CSV paths are "pdfs/<name>.pdf"; the files may live under static/ as well."""
+    for root in (PROJECT_ROOT_DIR, PROJECT_ROOT_DIR / "static"):
+        candidate = root / path
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def extract_snippet(pdf_path):
+    """Returns (pdf_path, snippet, error). Runs in a worker process."""
+    try:
+        doc = fitz.open(pdf_path)
+        # Get first page of the pdf
+        page = doc[0]
+        text = page.get_text("text")
+        doc.close()
+    except Exception as e:
+        return pdf_path, "", f"{type(e).__name__}: {e}"
+
+    snippet = ""
+    found = False
+    for line in str(text).splitlines():
+        if found:
+            snippet += line
+        if "Headnotes" in line:
+            found = True
+    return pdf_path, snippet, None
+
+
+def load_cache():
+    try:
+        with open(CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache):
+    tmp_path = f"{CACHE_PATH}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, CACHE_PATH)
+
+
+def extract_snippets(pdf_paths, workers=None, cache=None):
+    """Extracts snippets for `pdf_paths` across processes.
+
+    Returns ({path: snippet}, [(path, error), ...]). Paths whose mtime and
+    size match an entry in `cache` are not reopened; `cache` is updated in
+    place with every successful extraction.
+    """
+    cache = {} if cache is None else cache
+    snippets = {}
+    todo = []
+    errors = []
+    for path in dict.fromkeys(pdf_paths):
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            errors.append((path, f"{type(e).__name__}: {e}"))
+            continue
+        entry = cache.get(path)
+        if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            snippets[path] = entry["snippet"]
+        else:
+            todo.append((path, stat))
+
+    if workers == 1:
+        results = map(extract_snippet, [path for path, _ in todo])
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(extract_snippet, [path for path, _ in todo], chunksize=4)
+    stats = dict(todo)
+    for path, snippet, error in results:
+        if error:
+            errors.append((path, error))
+            continue
+        snippets[path] = snippet
+        cache[path] = {"mtime": stats[path].st_mtime, "size": stats[path].st_size, "snippet": snippet}
+    if workers != 1:
+        executor.shutdown()
+    return snippets, errors
+
+
+def benchmark(pdf_dir=PROJECT_ROOT_DIR / "static" / "pdfs"):
+    paths = [str(p) for p in sorted(pdf_dir.glob("*.pdf"))]
+    for label, workers in (("serial", 1), (f"parallel ({os.cpu_count()} cores)", None)):
+        start = time.perf_counter()
+        snippets, errors = extract_snippets(paths, workers=workers)
+        elapsed = time.perf_counter() - start
+        print(f"{label:>24}: {len(snippets)} PDFs in {elapsed:.2f}s ({len(errors)} errors)")
+    cache = {}
+    extract_snippets(paths, cache=cache)
+    start = time.perf_counter()
+    extract_snippets(paths, cache=cache)
+    print(f"{'cached rerun':>24}: {len(paths)} PDFs in {time.perf_counter() - start:.2f}s")
+
+
+def merge(workers=None):
+    # Only finished topic CSVs: crawl_state.py keeps in-progress rows in "<topic>.csv.partial"
+    # and writes exports through "<topic>.csv.tmp" in the same directory.
+    csvs = sorted(csv for csv in CSV_PATH.glob("*.csv") if csv.is_file())
+    if not csvs:
+        # pd.concat([]) raises; leave merged_scraped_data.csv as it is.
+        print(f"No scraped CSVs in {CSV_PATH}; nothing to merge.")
+        return
+    frames = [pd.read_csv(csv) for csv in csvs]
+    merged_csv = pd.concat(frames, axis=0, ignore_index=True)
     merged_csv.dropna(inplace=True)
-    merged_csv.reset_index(drop=True)
 
     mask = ~merged_csv["pdf_path_or_url"].astype(str).str.contains("https", na=False)
     merged_csv = merged_csv[mask]
@@ -24,28 +131,34 @@ if __name__ == "__main__":
     merged_csv.drop_duplicates(inplace=True)
     merged_csv.reset_index(drop=True, inplace=True)
 
-    merged_csv["snippet"] = ""
-    # Add the snippet column to each row of the merged csv
-    for i, path in enumerate(merged_csv["pdf_path_or_url"]):
-        pdf_path = PROJECT_ROOT_DIR / path
+    resolved = {}
+    for path in merged_csv["pdf_path_or_url"]:
+        pdf_path = resolve_pdf(path)
+        if pdf_path is None:
+            print(f"Missing PDF: {path}")
+        else:
+            resolved[path] = str(pdf_path)
 
-        if not pdf_path.is_file():
-            print(merged_csv.loc[i, "title"])
+    cache = load_cache()
+    snippets, errors = extract_snippets(resolved.values(), workers=workers, cache=cache)
+    save_cache(cache)
+    for path, error in errors:
+        print(f"Could not read {path}: {error}")
 
-        doc = fitz.open(pdf_path)
-        # Get first page of the pdf
-        page = doc[0]
-        text = page.get_text("text")
-        doc.close()
+    # Add the snippet column to each row of the merged csv
+    merged_csv["snippet"] = [snippets.get(resolved.get(path), "") for path in merged_csv["pdf_path_or_url"]]
+    merged_csv.to_csv("merged_scraped_data.csv", index=False)
+    missing = len(merged_csv) - sum(1 for path in merged_csv["pdf_path_or_url"] if resolved.get(path) in snippets)
+    print(f"Wrote {len(merged_csv)} rows to merged_scraped_data.csv ({missing} without a snippet)")
 
-        snippet = ""
-        found = False
-        for line in str(text).splitlines():
-            if found:
-                snippet += line
-            if "Headnotes" in line:
-                found = True
 
-        merged_csv.at[i, "snippet"] = snippet
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge the scraped CSVs and add PDF headnote snippets")
+    parser.add_argument("--workers", type=int, default=None, help="extraction processes (default: one per core)")
+    parser.add_argument("--benchmark", action="store_true", help="time serial vs. parallel extraction over static/pdfs")
+    args = parser.parse_args()
 
-    merged_csv.to_csv("merged_scraped_data.csv", index=False)
+    if args.benchmark:
+        benchmark()
+    else:
+        merge(args.workers)
@@ -0,0 +1,283 @@
+"""Versioned schema migrations for users.db.
+
+MIGRATIONS is an append-only list of (version, description, function).
+migrate() applies the ones above the highest version recorded in
+schema_version, in order, and records each as it succeeds. Never edit a
+migration that has shipped; add a new one instead.
+
+Tables owned by a standalone script (cases_fts, case_passages, the
+content_hash column) keep their DDL in that module's ensure_schema(), which
+is idempotent. The migrations here call those functions so every database
+reaches the same version whichever entry point touched it first.
+
+    python migrations.py [--db users.db]          apply pending migrations
+    python migrations.py check [--db users.db]    EXPLAIN QUERY PLAN for the routes' queries (see queries.py)
+"""
+import argparse
+import sqlite3
+import sys
+import threading
+
+
+def execute_script(conn, script):
+    """Runs each statement in `script` with execute().
+
+    Unlike executescript(), which commits any open transaction first, this
+    leaves the statements inside the caller's transaction.
+    """
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+    if statement.strip():
+        conn.execute(statement)
+
+
+def _base_tables(conn):
+    execute_script(conn, '''
+        CREATE TABLE IF NOT EXISTS users (email TEXT PRIMARY KEY, name TEXT NOT NULL, pwd TEXT NOT NULL, dob TEXT);
+        CREATE TABLE IF NOT EXISTS cases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            case_title TEXT NOT NULL,
+            citation TEXT,
+            judges TEXT,
+            judgement_date TEXT,
+            case_id TEXT,
+            bench TEXT,
+            pdf_path TEXT,
+            snippet TEXT,
+            embedding BLOB,
+            content_hash TEXT
+        );
+        CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT NOT NULL, query TEXT NOT NULL, created_at DATETIME DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE IF NOT EXISTS lawyers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            url TEXT,
+            image_url TEXT,
+            city TEXT,
+            state TEXT,
+            address TEXT,
+            specialization TEXT,
+            experience TEXT,
+            rating TEXT
+        );
+    ''')
+
+
+def _ai_caches(conn):
+    execute_script(conn, '''
+        CREATE TABLE IF NOT EXISTS query_embeddings (
+            model TEXT NOT NULL,
+            query TEXT NOT NULL,
+            embedding BLOB NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (model, query)
+        );
+        CREATE TABLE IF NOT EXISTS case_summaries (
+            case_id INTEGER NOT NULL,
+            query TEXT NOT NULL,
+            model TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (case_id, query, model)
+        );
+        CREATE INDEX IF NOT EXISTS idx_case_summaries_created_at ON case_summaries(created_at);
+    ''')
+
+
+def _content_hash(conn):
+    from ingest import ensure_schema
+
+    ensure_schema(conn)
+
+
+def _full_text_index(conn):
+    from lexical_index import ensure_schema
+
+    ensure_schema(conn)
+
+
+def _passages(conn):
+    from passages import ensure_schema
+
+    ensure_schema(conn)
+
+
+def _history_and_lawyer_indexes(conn):
+    # Keep only the most recent row per (email, query) so the unique index can be built.
+    conn.execute('''
+        DELETE FROM history WHERE id NOT IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (PARTITION BY email, query ORDER BY created_at DESC, id DESC) AS rn
+                FROM history
+            ) WHERE rn = 1
+        )
+    ''')
+    execute_script(conn, '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_history_email_query ON history(email, query);
+        CREATE INDEX IF NOT EXISTS idx_history_email_created_at ON history(email, created_at);
+        CREATE INDEX IF NOT EXISTS idx_lawyers_city ON lawyers(city COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_lawyers_name ON lawyers(name COLLATE NOCASE);
+    ''')
+
+
+def _practice_areas(conn):
+    # Dropping lawyers here is only safe because a migration runs once per
+    # database: at version 7 the table held nothing but rows loaded from
+    # lawyers.csv, which the next load_lawyers_csv() writes back with typed
+    # columns. Later loads upsert and never come through here again.
+    execute_script(conn, '''
+        DROP TABLE IF EXISTS lawyers;
+        CREATE TABLE lawyers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            url TEXT,
+            image_url TEXT,
+            city TEXT,
+            state TEXT,
+            address TEXT,
+            specialization TEXT,
+            experience INTEGER,
+            rating REAL
+        );
+        CREATE INDEX idx_lawyers_city ON lawyers(city COLLATE NOCASE);
+        CREATE INDEX idx_lawyers_name ON lawyers(name COLLATE NOCASE);
+        CREATE INDEX idx_lawyers_rating ON lawyers(rating DESC);
+        CREATE TABLE practice_areas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE COLLATE NOCASE
+        );
+        -- rating is copied from lawyers so the top-rated lawyers for an area come straight off an index.
+        CREATE TABLE lawyer_practice_areas (
+            practice_area_id INTEGER NOT NULL REFERENCES practice_areas(id),
+            lawyer_id INTEGER NOT NULL REFERENCES lawyers(id),
+            rating REAL,
+            PRIMARY KEY (practice_area_id, lawyer_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX idx_lawyer_practice_areas_rating ON lawyer_practice_areas(practice_area_id, rating DESC);
+        CREATE INDEX idx_lawyer_practice_areas_lawyer ON lawyer_practice_areas(lawyer_id);
+    ''')
+
+
+def _lawyer_upserts(conn):
+    # url identifies a lawyer; keep the newest row per url so it can be unique.
+    conn.execute("DELETE FROM lawyers WHERE id NOT IN (SELECT MAX(id) FROM lawyers GROUP BY url)")
+    conn.execute("DELETE FROM lawyer_practice_areas WHERE lawyer_id NOT IN (SELECT id FROM lawyers)")
+    execute_script(conn, '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_lawyers_url ON lawyers(url);
+        CREATE TABLE IF NOT EXISTS data_loads (
+            source TEXT PRIMARY KEY,
+            checksum TEXT NOT NULL,
+            rows INTEGER,
+            loaded_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+
+
+def _fts_update_trigger_columns(conn):
+    # CREATE TRIGGER IF NOT EXISTS keeps the old AFTER UPDATE ON cases trigger,
+    # so drop it for ensure_schema() to recreate it on the indexed columns only.
+    from lexical_index import ensure_schema
+
+    conn.execute("DROP TRIGGER IF EXISTS cases_fts_update")
+    ensure_schema(conn)
+
+
+def _data_load_history(conn):
+    # One row per load instead of per source, so a reload is visible as a new id.
+    execute_script(conn, '''
+        ALTER TABLE data_loads RENAME TO data_loads_old;
+        CREATE TABLE data_loads (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            rows INTEGER,
+            loaded_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX idx_data_loads_source ON data_loads(source, id);
+        INSERT INTO data_loads (source, checksum, rows, loaded_at)
+            SELECT source, checksum, rows, loaded_at FROM data_loads_old ORDER BY loaded_at;
+        DROP TABLE data_loads_old;
+    ''')
+
+
+MIGRATIONS = [
+    (1, "users, cases, history and lawyers tables", _base_tables),
+    (2, "query embedding and summary caches", _ai_caches),
+    (3, "cases.content_hash", _content_hash),
+    (4, "cases_fts full-text index", _full_text_index),
+    (5, "case_passages", _passages),
+    (6, "history and lawyers indexes", _history_and_lawyer_indexes),
+    (7, "typed lawyers columns and practice_areas", _practice_areas),
+    (8, "unique lawyers.url and data_loads checksums", _lawyer_upserts),
+    (9, "cases_fts update trigger on indexed columns only", _fts_update_trigger_columns),
+    (10, "data_loads row per load", _data_load_history),
+]
+
+_migrate_lock = threading.Lock()
+
+
+def current_version(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''')
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def migrate(conn, verbose=False):
+    """Applies pending migrations. Returns the list of versions applied.
+
+    Each migration and its schema_version row commit together in one
+    transaction, so a failed step leaves no partial DDL behind. The version
+    is re-read after BEGIN IMMEDIATE takes the write lock, so a second
+    process migrating the same file at once skips what the first applied.
+    """
+    applied = []
+    with _migrate_lock:
+        version = current_version(conn)
+        conn.commit()
+        for number, description, apply in MIGRATIONS:
+            if number <= version:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if number <= current_version(conn):
+                    conn.rollback()
+                    continue
+                apply(conn)
+                conn.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)", (number, description))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                print(f"Migration {number} ({description}) failed")
+                raise
+            applied.append(number)
+            if verbose:
+                print(f"Applied migration {number}: {description}")
+    return applied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply or check users.db schema migrations")
+    parser.add_argument("command", nargs="?", choices=["migrate", "check"], default="migrate")
+    parser.add_argument("--db", default="users.db")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    migrate(conn, verbose=True)
+    print(f"Schema version {current_version(conn)}")
+    if args.command == "check":
+        from queries import check_query_plans
+
+        failed = 0
+        for name, plan, ok in check_query_plans(conn):
+            failed += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name}: {plan}")
+        conn.close()
+        sys.exit(1 if failed else 0)
+    conn.close()
@@ -0,0 +1,192 @@
+"""Topic-keyed cache in front of newsapi.org for /news.
+
+NewsClient makes the upstream call through one pooled requests.Session
+with connect/read timeouts. The base URL comes from NEWS_API_URL, so a
+local stub server can stand in for newsapi.org.
+
+NewsCache serves each topic from memory:
+
+- fresh (younger than `ttl`): returned as is;
+- stale (younger than `stale_ttl`): returned immediately while one
+  background refresh per topic fetches a new copy (stale-while-revalidate);
+- missing or expired: fetched inline, waiting at most `wait_timeout`.
+
+If upstream fails, the last good copy is kept and served. A background
+thread re-fetches the hot topics (HOT_TOPICS plus the most requested ones)
+before they go stale, so the default 'legal' page is normally a memory hit.
+Topics come straight from the query string, so at most `max_topics` are
+kept: the least recently requested topic loses its articles and its request
+count together. HOT_TOPICS are never evicted.
+"""
+import concurrent.futures
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+INDIAN_SOURCES = ("livelaw.in,barandbench.com,timesofindia.indiatimes.com,thehindu.com,hindustantimes.com,"
+                  "indianexpress.com,ndtv.com,indiatoday.in,theprint.in")
+HOT_TOPICS = ("legal",)
+
+
+class NewsClient:
+    def __init__(self, api_key, base_url=None, timeout=(3.05, 8), page_size=100, pool_size=8):
+        self.api_key = api_key
+        self.base_url = (base_url or os.getenv("NEWS_API_URL", "https://newsapi.org/v2")).rstrip("/")
+        self.timeout = timeout
+        self.page_size = page_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, topic):
+        """Articles for `topic`, newest first. Raises on HTTP or API errors."""
+        params = {'q': topic, 'domains': INDIAN_SOURCES, 'searchIn': 'title,description',
+                  'language': 'en', 'sortBy': 'relevancy', 'pageSize': self.page_size}
+        # The key goes in a header so it never shows up in logged request URLs.
+        response = self.session.get(f"{self.base_url}/everything", params=params, timeout=self.timeout,
+                                    headers={'X-Api-Key': self.api_key or ''})
+        if response.status_code != 200:
+            raise RuntimeError(f"News API HTTP {response.status_code}")
+        data = response.json()
+        if data.get('status') != 'ok':
+            raise RuntimeError(f"News API error: {data.get('code')} {data.get('message')}")
+        articles = data.get('articles', [])
+        articles.sort(key=lambda x: x.get('publishedAt') or '', reverse=True)
+        return articles
+
+
+class NewsCache:
+    def __init__(self, fetch, ttl=15 * 60, stale_ttl=24 * 3600, wait_timeout=5.0, hot_topics=HOT_TOPICS,
+                 hot_limit=5, refresh_every=60, workers=2, max_topics=256):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.wait_timeout = wait_timeout
+        self.hot_topics = tuple(hot_topics)
+        self.hot_limit = hot_limit
+        self.refresh_every = refresh_every
+        self.max_topics = max_topics
+        self._pinned = {self.key(t) for t in self.hot_topics}
+        self._entries = {}
+        self._inflight = {}
+        # Request counts, least recently requested first.
+        self._requests = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="news")
+        self._refresher = None
+        self._stop = threading.Event()
+        self.counts = {"fresh": 0, "stale": 0, "miss": 0, "errors": 0, "refreshes": 0}
+
+    @staticmethod
+    def key(topic):
+        return " ".join(str(topic).lower().split())
+
+    def _refresh(self, key, topic):
+        try:
+            articles = self.fetch(topic)
+        except Exception as e:
+            print(f"News Refresh Error ({topic}): {e}")
+            with self._lock:
+                self.counts["errors"] += 1
+                self._inflight.pop(key, None)
+            raise
+        with self._lock:
+            # A topic evicted while its fetch was running stays evicted.
+            if key in self._requests or key in self._pinned:
+                self._entries[key] = (articles, time.time())
+            self.counts["refreshes"] += 1
+            self._inflight.pop(key, None)
+        return articles
+
+    def _schedule(self, key, topic):
+        """Starts a refresh for `key` unless one is already running. Returns its future."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._refresh, key, topic)
+                self._inflight[key] = future
+            return future
+
+    def get(self, topic):
+        """Returns (articles, state), state being 'fresh', 'stale', 'miss' or 'error'."""
+        self.start()
+        key = self.key(topic)
+        now = time.time()
+        with self._lock:
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._requests.move_to_end(key)
+            self._evict()
+            entry = self._entries.get(key)
+            age = now - entry[1] if entry else None
+            state = "fresh" if entry and age < self.ttl else "stale" if entry and age < self.stale_ttl else "miss"
+            self.counts[state] += 1
+        if state == "fresh":
+            return entry[0], state
+        if state == "stale":
+            self._schedule(key, topic)
+            return entry[0], state
+
+        future = self._schedule(key, topic)
+        try:
+            return future.result(timeout=self.wait_timeout), "miss"
+        except Exception:
+            # Upstream failed or is slow; an expired copy beats an empty page.
+            return (entry[0] if entry else []), "error"
+
+    def _evict(self):
+        """Drops the least recently requested topics beyond max_topics. Called with the lock held."""
+        while len(self._requests) > self.max_topics:
+            key, _ = self._requests.popitem(last=False)
+            if key not in self._pinned:
+                self._entries.pop(key, None)
+
+    def hot(self):
+        with self._lock:
+            popular = sorted(self._requests, key=self._requests.get, reverse=True)[:self.hot_limit]
+            topics = dict.fromkeys([self.key(t) for t in self.hot_topics] + popular)
+            return list(topics)
+
+    def refresh_hot(self):
+        """Re-fetches hot topics that will expire before the next pass."""
+        now = time.time()
+        for key in self.hot():
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None or now - entry[1] > self.ttl - self.refresh_every:
+                self._schedule(key, key)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh_hot()
+            except Exception as e:
+                print(f"News Refresher Error: {e}")
+            self._stop.wait(self.refresh_every)
+
+    def start(self):
+        """Starts the background refresher once; called lazily by get()."""
+        if self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._run, name="news-refresher", daemon=True)
+                self._refresher.start()
+
+    def stop(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return {
+                **self.counts,
+                "topics": {key: {"articles": len(articles), "age_s": round(now - fetched_at, 1),
+                                 "requests": self._requests.get(key, 0)}
+                           for key, (articles, fetched_at) in self._entries.items()},
+            }
@@ -0,0 +1,209 @@
+"""Passage-level index over the full text of each judgment PDF.
+
+merge_all_csv.py only keeps the Headnotes from page 0, so the rest of a
+judgment is invisible to search. This module streams every page of each
+case's PDF, cuts the text into overlapping chunks, embeds them in batches
+and stores them in case_passages. At query time PassageIndex ranks
+passages and pools their scores per case (max or sum).
+
+Ingestion holds one page and one embedding batch in memory at a time. It
+commits after every batch, so it can be interrupted and re-run:
+
+    python passages.py [--db users.db] [--fake] [--limit N]
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+import fitz
+import numpy as np
+
+from case_index import CaseIndex
+from embedding_store import encode_embedding
+from gemini_pool import FakeBackend, GeminiPool
+from migrations import execute_script
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+CHUNK_CHARS = 1500
+CHUNK_OVERLAP = 200
+
+
+def ensure_schema(conn):
+    execute_script(conn, '''
+        CREATE TABLE IF NOT EXISTS case_passages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            case_id INTEGER NOT NULL REFERENCES cases(id),
+            chunk_no INTEGER NOT NULL,
+            page_no INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            embedding BLOB,
+            UNIQUE (case_id, chunk_no)
+        );
+        CREATE TABLE IF NOT EXISTS case_passage_status (
+            case_id INTEGER PRIMARY KEY REFERENCES cases(id),
+            chunks INTEGER NOT NULL,
+            indexed_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+    ''')
+
+
+def resolve_pdf_path(pdf_path, roots=(".", "static")):
+    """cases.pdf_path is relative ("pdfs/<title>.pdf"); the files are served from static/pdfs."""
+    for root in roots:
+        candidate = os.path.join(root, pdf_path)
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def iter_pdf_pages(path):
+    """Yields (page_no, text) one page at a time."""
+    with fitz.open(path) as doc:
+        for page_no, page in enumerate(doc):
+            yield page_no, page.get_text("text")
+
+
+def chunk_pages(pages, chunk_chars=CHUNK_CHARS, overlap=CHUNK_OVERLAP):
+    """Yields (page_no, text) chunks of about chunk_chars with `overlap` chars carried over.
+
+    Chunks end on whitespace where possible. page_no is the page the chunk
+    starts on. Only the unfinished tail of the previous page is buffered.
+    """
+    if overlap * 2 >= chunk_chars:
+        raise ValueError("overlap must be less than half of chunk_chars")
+    buffer = ""
+    buffer_page = 0
+    for page_no, text in pages:
+        text = " ".join(text.split())
+        if not text:
+            continue
+        if not buffer:
+            buffer_page = page_no
+        buffer = f"{buffer} {text}" if buffer else text
+        while len(buffer) >= chunk_chars:
+            cut = buffer.rfind(" ", chunk_chars - overlap, chunk_chars)
+            if cut <= 0:
+                cut = chunk_chars
+            yield buffer_page, buffer[:cut].strip()
+            tail = buffer.find(" ", cut - overlap, cut)
+            buffer = buffer[tail if tail > 0 else cut - overlap:].lstrip()
+            buffer_page = page_no
+    if buffer.strip():
+        yield buffer_page, buffer.strip()
+
+
+def _flush(conn, pool, case_id, batch):
+    vectors = pool.embed(EMBEDDING_MODEL, [text for _, _, text in batch], "RETRIEVAL_DOCUMENT")
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO case_passages (case_id, chunk_no, page_no, text, embedding) VALUES (?,?,?,?,?)",
+            [(case_id, chunk_no, page_no, text, encode_embedding(vector))
+             for (chunk_no, page_no, text), vector in zip(batch, vectors)],
+        )
+
+
+def ingest_case(conn, pool, case_id, path, batch_size=32, chunk_chars=CHUNK_CHARS, overlap=CHUNK_OVERLAP):
+    """Embeds one case's passages, skipping chunks a previous run already stored."""
+    done = conn.execute("SELECT COALESCE(MAX(chunk_no), -1) FROM case_passages WHERE case_id = ?", (case_id,)).fetchone()[0]
+    batch = []
+    chunks = 0
+    for chunk_no, (page_no, text) in enumerate(chunk_pages(iter_pdf_pages(path), chunk_chars, overlap)):
+        chunks += 1
+        if chunk_no <= done:
+            continue
+        batch.append((chunk_no, page_no, text))
+        if len(batch) >= batch_size:
+            _flush(conn, pool, case_id, batch)
+            batch = []
+    if batch:
+        _flush(conn, pool, case_id, batch)
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO case_passage_status (case_id, chunks) VALUES (?, ?)", (case_id, chunks))
+    return chunks
+
+
+def ingest_passages(db_path, pool, batch_size=32, limit=None):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        ensure_schema(conn)
+    cases = conn.execute('''SELECT id, pdf_path FROM cases
+                            WHERE pdf_path IS NOT NULL AND id NOT IN (SELECT case_id FROM case_passage_status)
+                            ORDER BY id''').fetchall()
+    if limit:
+        cases = cases[:limit]
+
+    start = time.perf_counter()
+    total_chunks = 0
+    for i, (case_id, pdf_path) in enumerate(cases):
+        path = resolve_pdf_path(pdf_path)
+        if path is None:
+            print(f"Skipping case {case_id}: PDF not found ({pdf_path})")
+            continue
+        try:
+            chunks = ingest_case(conn, pool, case_id, path, batch_size)
+        except Exception as e:
+            print(f"Passage Error for case {case_id} ({pdf_path}): {e}")
+            continue
+        total_chunks += chunks
+        print(f"[{i + 1}/{len(cases)}] case {case_id}: {chunks} passages")
+
+    conn.close()
+    elapsed = time.perf_counter() - start
+    print(f"Indexed {total_chunks} passages from {len(cases)} cases in {elapsed:.1f}s")
+    return total_chunks
+
+
+class PassageIndex(CaseIndex):
+    """Vector index over case_passages that ranks cases by pooled passage scores."""
+
+    table = "case_passages"
+    extra_columns = ("case_id",)
+
+    def __init__(self, engine=None, pooling="max"):
+        super().__init__(engine)
+        self.pooling = pooling
+        self.case_of = {}
+
+    def refresh(self, conn):
+        try:
+            return super().refresh(conn)
+        except sqlite3.OperationalError:
+            # No passages have been ingested into this database yet.
+            return 0
+
+    def _on_indexed(self, ids, extras):
+        # case_id comes from the same SELECT as the embeddings, so every indexed passage has its case.
+        self.case_of.update((passage_id, case_id) for passage_id, (case_id,) in zip(ids, extras))
+
+    def rank_cases(self, q_vec, depth, passages_per_case=4):
+        """Returns up to `depth` case ids, best first, pooled from the top passages."""
+        passage_ids, scores = self.search_window(q_vec, 0, depth * passages_per_case)
+        pooled = {}
+        for passage_id, score in zip(passage_ids, scores):
+            case_id = self.case_of.get(int(passage_id))
+            if case_id is None:
+                continue
+            if self.pooling == "sum":
+                pooled[case_id] = pooled.get(case_id, 0.0) + float(score)
+            else:
+                pooled[case_id] = max(pooled.get(case_id, -np.inf), float(score))
+        return sorted(pooled, key=pooled.get, reverse=True)[:depth]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed full-text passages of case PDFs")
+    parser.add_argument("--db", default="users.db")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=None, help="only process this many cases")
+    parser.add_argument("--fake", action="store_true", help="use the deterministic offline embedder")
+    args = parser.parse_args()
+
+    if args.fake:
+        pool = GeminiPool({"fake": FakeBackend()}, rpm=60000)
+    else:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        pool = GeminiPool.from_env()
+    ingest_passages(args.db, pool, args.batch_size, args.limit)
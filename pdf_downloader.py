@@ -0,0 +1,273 @@
+"""Concurrent, resumable PDF downloads for the Supreme Court scraper.
+
+scraping.py discovers PDF URLs and hands them to PdfDownloader.submit().
+A bounded pool of worker threads downloads them over one pooled
+requests.Session, and a RateLimiter shared by all workers spaces out the
+requests so the site is not hammered. Each download:
+
+- is skipped when the file is already on disk and the server still
+  reports the same ETag (or, without one, the same Content-Length);
+- is written to "<name>.pdf.part" and renamed into place only once it is
+  complete and starts with a %PDF header, so an interrupted run never
+  leaves a truncated PDF behind;
+- resumes a leftover .part file with an HTTP Range request;
+- is dropped in favour of an existing file with the same SHA-256.
+
+What has been downloaded is recorded in MANIFEST_NAME inside the output
+directory. URLs can also be downloaded from a file, one per line:
+
+    python pdf_downloader.py urls.txt [--out pdfs] [--workers 4] [--rate 1.0]
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MANIFEST_NAME = ".downloads.json"
+PDF_MAGIC = b"%PDF-"
+CHUNK_SIZE = 64 * 1024
+
+
+class NotPdfError(Exception):
+    """The server answered with something other than a PDF, usually a rate-limit or error page."""
+
+
+class RateLimiter:
+    """Lets at most `rate` requests per second through, across threads. rate <= 0 disables it."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def pooled_session(pool_size, headers=None):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PdfDownloader:
+    def __init__(self, out_dir="pdfs", session=None, workers=4, rate=1.0, max_pending=None, timeout=(5, 30),
+                 retries=2, limiter=None):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.session = session or pooled_session(workers)
+        # Pass a shared limiter to pace these downloads together with other requests to the same site.
+        self.limiter = limiter or RateLimiter(rate)
+        self.timeout = timeout
+        self.retries = retries
+        self.manifest_path = self.out_dir / MANIFEST_NAME
+        self._lock = threading.Lock()
+        self._manifest = self._load_manifest()
+        self._by_hash = {entry["sha256"]: entry["path"] for entry in self._manifest.values() if entry.get("sha256")}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf")
+        # submit() blocks once this many downloads are queued, so discovery can't run far ahead.
+        self._slots = threading.BoundedSemaphore(max_pending or workers * 4)
+        self.counts = {"downloaded": 0, "resumed": 0, "skipped": 0, "duplicate": 0, "not_pdf": 0, "failed": 0}
+        self.bytes = 0
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _record(self, url, path, etag, size, sha256):
+        with self._lock:
+            self._manifest[url] = {"path": str(path), "etag": etag, "size": size, "sha256": sha256}
+            self._by_hash.setdefault(sha256, str(path))
+            self._save_manifest()
+
+    def rename(self, url, new_path):
+        """Moves a finished download to `new_path` and keeps the manifest pointing at it."""
+        with self._lock:
+            entry = self._manifest.get(url)
+            if not entry:
+                return None
+            new_path = Path(new_path)
+            os.replace(entry["path"], new_path)
+            if self._by_hash.get(entry["sha256"]) == entry["path"]:
+                self._by_hash[entry["sha256"]] = str(new_path)
+            entry["path"] = str(new_path)
+            self._save_manifest()
+            return new_path
+
+    def _request(self, method, url, session=None, **kwargs):
+        self.limiter.wait()
+        return (session or self.session).request(method, url, timeout=self.timeout, allow_redirects=True, **kwargs)
+
+    def _unchanged(self, url, out_path, entry, session=None):
+        """True when `out_path` already holds the current copy of `url`."""
+        if not entry or not out_path.is_file() or out_path.stat().st_size != entry["size"]:
+            return False
+        try:
+            resp = self._request("HEAD", url, session)
+        except requests.RequestException:
+            return True  # Can't check; a complete, verified copy is better than nothing.
+        if resp.status_code != 200:
+            return False
+        etag = resp.headers.get("ETag")
+        if etag and entry.get("etag"):
+            return etag == entry["etag"]
+        length = resp.headers.get("Content-Length")
+        return length is None or int(length) == entry["size"]
+
+    def _fetch(self, url, part_path, etag, session=None):
+        """Streams `url` into `part_path`, resuming it if it exists. Returns (etag, resumed)."""
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            if etag:
+                headers["If-Range"] = etag
+        with self._request("GET", url, session, headers=headers, stream=True) as resp:
+            if resp.status_code == 416 and offset:
+                # The .part file already holds the whole body.
+                return etag, True
+            if resp.status_code not in (200, 206):
+                raise requests.HTTPError(f"HTTP {resp.status_code}", response=resp)
+            resumed = resp.status_code == 206
+            chunks = resp.iter_content(CHUNK_SIZE)
+            first = b""
+            if not resumed:
+                for chunk in chunks:
+                    first += chunk
+                    if len(first) >= len(PDF_MAGIC):
+                        break
+                if not first.startswith(PDF_MAGIC):
+                    raise NotPdfError(f"{resp.headers.get('Content-Type', 'unknown content')} instead of a PDF")
+            with open(part_path, "ab" if resumed else "wb") as f:
+                f.write(first)
+                for chunk in chunks:
+                    f.write(chunk)
+            return resp.headers.get("ETag") or etag, resumed
+
+    def download(self, url, out_path, session=None):
+        """Downloads `url` to `out_path`. Returns a result dict; "status" is one of self.counts.
+
+        `session` overrides the downloader's own, e.g. to send one browser's cookies.
+        """
+        out_path = Path(out_path)
+        part_path = out_path.with_name(out_path.name + ".part")
+        with self._lock:
+            entry = self._manifest.get(url)
+        if entry and self._unchanged(url, Path(entry["path"]), entry, session):
+            return self._result(url, entry["path"], "skipped", sha256=entry["sha256"])
+
+        etag = entry.get("etag") if entry else None
+        for attempt in range(self.retries + 1):
+            try:
+                etag, resumed = self._fetch(url, part_path, etag, session)
+                break
+            except NotPdfError as e:
+                part_path.unlink(missing_ok=True)
+                return self._result(url, None, "not_pdf", error=str(e))
+            except (requests.RequestException, OSError) as e:
+                if attempt == self.retries:
+                    return self._result(url, None, "failed", error=f"{type(e).__name__}: {e}")
+                time.sleep(2 ** attempt)
+
+        with open(part_path, "rb") as f:
+            if f.read(len(PDF_MAGIC)) != PDF_MAGIC:
+                part_path.unlink()
+                return self._result(url, None, "not_pdf", error="resumed file has no PDF header")
+        size = part_path.stat().st_size
+        sha256 = file_sha256(part_path)
+        with self._lock:
+            existing = self._by_hash.get(sha256)
+        if existing and Path(existing).is_file() and Path(existing) != out_path:
+            part_path.unlink()
+            self._record(url, existing, etag, size, sha256)
+            return self._result(url, existing, "duplicate", sha256=sha256)
+
+        os.replace(part_path, out_path)
+        self._record(url, out_path, etag, size, sha256)
+        return self._result(url, str(out_path), "resumed" if resumed else "downloaded", size=size, sha256=sha256)
+
+    def _result(self, url, path, status, size=0, sha256=None, error=None):
+        with self._lock:
+            self.counts[status] += 1
+            self.bytes += size
+        return {"url": url, "path": path, "status": status, "bytes": size, "sha256": sha256, "error": error}
+
+    def submit(self, url, out_path, callback=None, session=None):
+        """Queues a download and returns its Future. `callback(result)` runs on the worker thread."""
+        self._slots.acquire()
+
+        def run():
+            try:
+                result = self.download(url, out_path, session)
+                if callback:
+                    callback(result)
+                return result
+            finally:
+                self._slots.release()
+
+        try:
+            return self._executor.submit(run)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def close(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def stats(self):
+        with self._lock:
+            return {**self.counts, "bytes": self.bytes, "known": len(self._manifest)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download PDFs listed one URL per line")
+    parser.add_argument("urls")
+    parser.add_argument("--out", default="pdfs")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1.0, help="requests per second across all workers")
+    args = parser.parse_args()
+
+    with open(args.urls) as f:
+        urls = [line.strip() for line in f if line.strip()]
+    downloader = PdfDownloader(args.out, workers=args.workers, rate=args.rate)
+    for url in urls:
+        name = url.rstrip("/").rsplit("/", 1)[-1].split("?")[0] or "download"
+        if not name.lower().endswith(".pdf"):
+            name += ".pdf"
+        downloader.submit(url, Path(args.out) / name,
+                          callback=lambda r: print(f"[{r['status']}] {r['url']} {r['error'] or r['path']}"))
+    downloader.close()
+    print(downloader.stats())
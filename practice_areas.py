@@ -0,0 +1,152 @@
+"""Maps a search query to a lawyer practice area without calling Gemini.
+
+The labels are the practice areas scraped into lawyers.csv ("Divorce",
+"Cheque Bounce", "Dowry Case", ...), so a confident answer always joins
+against lawyer_practice_areas. PracticeAreaClassifier matches the query
+against those names and against RULES, a keyword table for the terms people
+actually search for ("498A", "alimony", "robbery"). Each match carries a
+confidence. Below `min_confidence` label() returns None, and the caller
+falls back to the LLM and hands the answer to remember() (see
+get_practice_area_keywords in app.py).
+"""
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from ai_cache import normalize_query
+from lawyer_store import split_practice_areas
+
+# Vocabulary entries that name a forum rather than a kind of matter. A query
+# mentioning "Supreme Court" says little about which lawyer it needs.
+FORUMS = {"high court", "supreme court", "litigation", "documentation"}
+
+# (label, confidence, pattern). A direct mention of an area's name scores 1.0
+# (0.5 for FORUMS), so the rules below win over a forum name. Every
+# alternative is matched as whole words (the classifier wraps the pattern in
+# \b(?:...)\b): "visa" must not fire inside "advisable", nor "riot" inside
+# "patriotic". Inflections are spelled out. A confident wrong label skips the
+# LLM, so custody needs a child or minor next to it (police custody is not
+# Child Custody), and bare "bail" only says Criminal, not Anticipatory Bail.
+RULES = [
+    ("Dowry Case", 0.9, r"dowry|498\s*-?\s*a|304\s*-?\s*b|bride burning"),
+    ("Domestic Violence", 0.9, r"domestic violence|dv act|protection of women from domestic violence|wife beating"),
+    ("Divorce", 0.9, r"divorced?|alimony|judicial separation|restitution of conjugal rights|talaq|annulment"),
+    ("Child Custody", 0.9, r"(?:child|children|minor|son|daughter|kids?)(?:'s)?(?:\W+\w+){0,3}?\W+custody|"
+                           r"custody of (?:the |my |our |a |his |her )?(?:child|children|minor|son|daughter|kids?)|"
+                           r"guardianship|visitation rights"),
+    ("Family", 0.7, r"maintenance|section 125|matrimonial|marriage dispute|in-laws"),
+    ("Court Marriage", 0.8, r"court marriage|special marriage act|marriage registration"),
+    ("Cheque Bounce", 0.95, r"cheques?|check bounce|dishonou?r of cheque|negotiable instruments?|section 138|ni act"),
+    ("Anticipatory Bail", 0.9, r"anticipatory bail|pre-arrest bail|section 438"),
+    ("Pocso Act", 0.95, r"pocso|child sexual abuse|sexual offences against children"),
+    ("Pmla", 0.9, r"money laundering|pmla|enforcement directorate|ed raids?"),
+    ("Anti Corruption", 0.9, r"corruption|brib(?:e|es|ed|ery)|prevention of corruption|disproportionate assets"),
+    ("Fraud Case", 0.8, r"fraud|frauds|fraudulent|forgery|forged|cheating|section 420|impersonation"),
+    ("Cyber Crime", 0.9, r"cyber|cyber ?crimes?|online fraud|hacking|hacked|phishing|sextortion|it act"),
+    ("Medical Negligence", 0.9, r"medical negligence|doctor negligence|hospital negligence"),
+    ("Motor Accident", 0.9, r"motor accident|road accident|mact|hit and run|rash driving"),
+    ("Landlord/Tenant", 0.9, r"landlords?|tenants?|tenancy|eviction|rent control|rent"),
+    ("Property", 0.8, r"property|properties|land dispute|partition suit|sale deed|encroachment|title deed|mutation"),
+    ("Succession Certificate", 0.85, r"succession|inheritance|legal heirs?|probate"),
+    ("Wills / Trusts", 0.85, r"wills?|testament|trusts?"),
+    ("Consumer Court", 0.9, r"consumers?|deficiency in service|defective product"),
+    ("Labour & Service", 0.85, r"labour|labor|service matters?|wrongful termination|gratuity|provident fund|industrial dispute"),
+    ("Trademark & Copyright", 0.9, r"trademarks?|copyrights?|infringement|passing off"),
+    ("Patent", 0.9, r"patents?|patented"),
+    ("Bankruptcy / Insolvency", 0.9, r"insolvency|bankruptcy|bankrupt|ibc|liquidation"),
+    ("NCLT", 0.9, r"nclt|company law tribunal|oppression and mismanagement"),
+    ("Banking / Finance", 0.8, r"banks?|banking|loans?|sarfaesi|drt|npa"),
+    ("Recovery", 0.8, r"recovery|debts?|money suit"),
+    ("Tax", 0.85, r"income tax|tax|taxes|tax evasion"),
+    ("GST", 0.95, r"gst|goods and services tax"),
+    ("Immigration", 0.9, r"immigration|visas?|passports?"),
+    ("Muslim Law", 0.8, r"muslim|mehr|nikah|waqf"),
+    ("RERA", 0.95, r"rera|builder delay|flat possession"),
+    ("Armed Forces Tribunal", 0.95, r"armed forces|court martial"),
+    ("Breach of Contract", 0.85, r"breach of contract|specific performance|contract dispute"),
+    ("Arbitration", 0.9, r"arbitration|arbitral"),
+    ("Insurance", 0.9, r"insurance|claim repudiat(?:ed|ion)"),
+    ("R.T.I", 0.95, r"rti|right to information"),
+    ("Criminal", 0.7, r"murder|murdered|homicide|culpable|robbery|dacoity|theft|assault|assaulted|kidnapping|kidnapped|"
+                      r"abduction|extortion|riots?|rioting|trespass|rape|acid attack|trafficking|grievous hurt|"
+                      r"voluntarily causing hurt|criminal|ipc|bns|fir|section 302|section 307|attempt to murder|"
+                      r"ncb|ndps|narcotics|bail"),
+]
+
+
+class PracticeAreaClassifier:
+    def __init__(self, vocabulary=(), rules=RULES, min_confidence=0.6, cache_size=4096):
+        self.min_confidence = min_confidence
+        self.vocabulary = list(dict.fromkeys(vocabulary))
+        known = {area.lower() for area in self.vocabulary}
+        # Rules for areas nobody practises would suggest no lawyers; keep them only without a vocabulary.
+        self.rules = [(label, confidence, re.compile(rf"\b(?:{pattern})\b", re.IGNORECASE))
+                      for label, confidence, pattern in rules if not known or label.lower() in known]
+        self.names = [(area, 0.5 if area.lower() in FORUMS else 1.0, re.compile(rf"\b{re.escape(area)}\b", re.IGNORECASE))
+                      for area in self.vocabulary]
+        self._cache = OrderedDict()
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def from_csv(cls, path="lawyers.csv", **kwargs):
+        try:
+            specializations = pd.read_csv(path)["specialization"].dropna()
+        except (OSError, KeyError) as e:
+            print(f"Practice area vocabulary unavailable ({e}); using keyword rules only.")
+            specializations = []
+        vocabulary = sorted({area for value in specializations for area in split_practice_areas(value)})
+        return cls(vocabulary, **kwargs)
+
+    def classify(self, query):
+        """Returns (label, confidence); label is None when nothing matched."""
+        best = (None, 0.0, 0)
+        for area, confidence, pattern in self.names:
+            match = pattern.search(query)
+            if match:
+                best = max(best, (area, confidence, len(match.group())), key=lambda x: (x[1], x[2]))
+        if best[1] < 1.0:
+            for label, confidence, pattern in self.rules:
+                match = pattern.search(query)
+                if match:
+                    best = max(best, (label, confidence, len(match.group())), key=lambda x: (x[1], x[2]))
+        return best[0], best[1]
+
+    def label(self, query):
+        """Cached or confidently matched practice area for `query`, else None."""
+        key = normalize_query(query)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+
+        label, confidence = self.classify(key)
+        if confidence < self.min_confidence:
+            return None
+        self._remember(key, label)
+        return label
+
+    def remember(self, query, label):
+        """Caches a label that came from the LLM fallback."""
+        with self._lock:
+            self.fallbacks += 1
+        self._remember(normalize_query(query), label)
+
+    def _remember(self, key, label):
+        with self._lock:
+            self._cache[key] = label
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "llm_fallbacks": self.fallbacks,
+                    "entries": len(self._cache), "vocabulary": len(self.vocabulary)}
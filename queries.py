@@ -0,0 +1,79 @@
+"""SQL the Flask routes run against users.db, and a check that each is answered from an index.
+
+app.py executes the constants below. ROUTE_QUERIES pairs them, together
+with the lexical, lawyer and AI-cache queries from their own modules, with
+sample parameters. check_query_plans() runs EXPLAIN QUERY PLAN on each;
+`python migrations.py check` prints the result and tests/test_query_plans.py
+asserts it.
+"""
+from ai_cache import EMBEDDING_LOOKUP_SQL, SUMMARY_LOOKUP_SQL
+from lawyer_store import LATEST_LOAD_SQL, PRACTICE_AREA_LAWYERS_SQL, TOP_RATED_LAWYERS_SQL
+from lexical_index import LEXICAL_COUNT_SQL, LEXICAL_SEARCH_SQL
+
+RECORD_HISTORY_SQL = '''INSERT INTO history (email, query) VALUES (?, ?)
+                        ON CONFLICT(email, query) DO UPDATE SET created_at = CURRENT_TIMESTAMP'''
+RECENT_HISTORY_SQL = "SELECT query FROM history WHERE email=? ORDER BY created_at DESC LIMIT 5"
+ALL_HISTORY_SQL = "SELECT query, created_at FROM history WHERE email=? ORDER BY created_at DESC"
+PAGE_ROWS_SQL = "SELECT id, case_title, citation, judgement_date, snippet, case_id FROM cases WHERE id IN ({placeholders})"
+CASE_SNIPPET_SQL = "SELECT id, snippet FROM cases WHERE id = ?"
+DOC_VIEW_SQL = "SELECT case_id, case_title, citation, judgement_date, judges, pdf_path FROM cases WHERE id = ?"
+LOGIN_SQL = "SELECT name, pwd FROM users WHERE email=?"
+
+# Sample parameters for each query. Every one must be answered from an
+# index, not a full table scan or a sort.
+ROUTE_QUERIES = {
+    "/search_query history upsert": (RECORD_HISTORY_SQL, ("a@b.c", "dowry")),
+    "/ recent history": (RECENT_HISTORY_SQL, ("a@b.c",)),
+    "/history": (ALL_HISTORY_SQL, ("a@b.c",)),
+    "/search_query page rows": (PAGE_ROWS_SQL.format(placeholders="?,?,?"), (1, 2, 3)),
+    "/search_query lexical search": (LEXICAL_SEARCH_SQL, ('"dowry"', 10, 0)),
+    "/search_query lexical count": (LEXICAL_COUNT_SQL, ('"dowry"',)),
+    "/case_summary": (CASE_SNIPPET_SQL, (1,)),
+    "/doc_view": (DOC_VIEW_SQL, (1,)),
+    "/login": (LOGIN_SQL, ("a@b.c",)),
+    "summary cache": (SUMMARY_LOOKUP_SQL.format(placeholders="?,?"), ("q", "m", 0, 1, 2)),
+    "embedding cache": (EMBEDDING_LOOKUP_SQL, ("m", "q")),
+    "/search_query lawyer suggestions": (PRACTICE_AREA_LAWYERS_SQL, ("Divorce", 10)),
+    "/search_query top-rated lawyers": (TOP_RATED_LAWYERS_SQL, (10,)),
+    "/lawyers latest load": (LATEST_LOAD_SQL, ()),
+}
+
+
+def _conflict_plan(conn, sql, params):
+    """Plan steps for an INSERT ... ON CONFLICT, which EXPLAIN QUERY PLAN leaves empty.
+
+    The conflict target is probed with a NoConflict opcode on an index
+    cursor; this names the index each probe uses, read from the bytecode.
+    """
+    indexes = dict(conn.execute("SELECT rootpage, name FROM sqlite_master WHERE type = 'index'"))
+    cursors = {}
+    steps = []
+    for _, opcode, p1, p2, *_ in conn.execute(f"EXPLAIN {sql}", params):
+        if opcode in ("OpenRead", "OpenWrite"):
+            cursors[p1] = indexes.get(p2)
+        elif opcode == "NoConflict":
+            index = cursors.get(p1)
+            steps.append(f"SEARCH CONFLICT TARGET USING INDEX {index}" if index else "SCAN CONFLICT TARGET")
+    return steps
+
+
+def _step_ok(step):
+    if step.startswith("SEARCH "):
+        return True
+    # FTS5 marks a MATCH constraint with an "M" in its index string, e.g. "VIRTUAL TABLE INDEX 32:rM5".
+    if "VIRTUAL TABLE INDEX" in step:
+        return "M" in step.rsplit(":", 1)[-1]
+    return not step.startswith("SCAN ") or "USING" in step
+
+
+def check_query_plans(conn, queries=ROUTE_QUERIES):
+    """Returns [(name, plan, ok)]; ok is False when a query scans a table or sorts in a temp b-tree."""
+    results = []
+    for name, (sql, params) in queries.items():
+        steps = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        if not steps and "ON CONFLICT" in sql:
+            steps = _conflict_plan(conn, sql, params)
+        plan = " | ".join(steps)
+        ok = bool(steps) and all(_step_ok(step) for step in steps) and "TEMP B-TREE" not in plan
+        results.append((name, plan, ok))
+    return results
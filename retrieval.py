@@ -0,0 +1,303 @@
+"""Retrieval engines behind CaseIndex.
+
+Every engine stores L2-normalized float32 vectors keyed by cases.id and
+answers "which ids rank start..stop-1 for this unit query vector".
+
+- ExactEngine scores every vector (one matrix-vector product). Default.
+- IVFEngine partitions vectors with spherical k-means and only scores the
+  `nprobe` closest partitions. It persists to an .npz file next to the
+  database and assigns new vectors to their nearest centroid on insert.
+  The file also keeps the fingerprint CaseIndex computed for the rows it
+  holds, so an index saved against another copy of the database is rebuilt
+  instead of reused.
+"""
+import os
+import threading
+
+import numpy as np
+
+DEFAULT_ENGINE = os.getenv("RETRIEVAL_ENGINE", "exact")
+
+
+def top_k_window(scores, start, stop):
+    """Positions of the scores ranked start..stop-1 (descending), without a full sort.
+
+    np.argpartition with both window edges as pivots leaves exactly the
+    requested ranks between them, so only that slice has to be ordered. The
+    cost is O(n) plus O(window log window) no matter how deep the page is.
+    """
+    n = len(scores)
+    start = max(start, 0)
+    stop = min(stop, n)
+    if start >= stop:
+        return np.empty(0, dtype=np.int64)
+    neg = -scores
+    kth = [start, stop - 1] if stop - 1 > start else [start]
+    window = np.argpartition(neg, kth)[start:stop]
+    return window[np.argsort(neg[window], kind="stable")]
+
+
+class RetrievalEngine:
+    """Interface shared by all engines."""
+
+    name = None
+    # What CaseIndex passed to save() for the rows held; None for a fresh engine.
+    fingerprint = None
+
+    def __len__(self):
+        raise NotImplementedError
+
+    @property
+    def max_id(self):
+        """Highest cases.id already stored, so callers only feed newer rows."""
+        raise NotImplementedError
+
+    def add(self, ids, vectors):
+        """Stores unit-length `vectors` under `ids`."""
+        raise NotImplementedError
+
+    def search_window(self, q_vec, start, stop):
+        """Returns (ids, scores) ranked start..stop-1 for a unit query vector."""
+        raise NotImplementedError
+
+    def reset(self):
+        """Drops every stored vector."""
+        raise NotImplementedError
+
+    def save(self, fingerprint=None):
+        """Persists the engine, with `fingerprint` of the rows it holds, if it has on-disk state."""
+
+
+class ExactEngine(RetrievalEngine):
+    """Brute-force cosine scan over a growable float32 matrix."""
+
+    name = "exact"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._buf = None
+            self._ids = np.empty(0, dtype=np.int64)
+            self._size = 0
+            self.dim = None
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def matrix(self):
+        if self._buf is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return self._buf[:self._size]
+
+    @property
+    def ids(self):
+        return self._ids[:self._size]
+
+    @property
+    def max_id(self):
+        return int(self._ids[:self._size].max()) if self._size else 0
+
+    def add(self, ids, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n = len(ids)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            needed = self._size + n
+            if self._buf is None or needed > len(self._buf):
+                capacity = max(needed, 2 * (len(self._buf) if self._buf is not None else 0), 1024)
+                buf = np.empty((capacity, self.dim), dtype=np.float32)
+                ids_buf = np.empty(capacity, dtype=np.int64)
+                if self._buf is not None:
+                    buf[:self._size] = self._buf[:self._size]
+                    ids_buf[:self._size] = self._ids[:self._size]
+                self._buf = buf
+                self._ids = ids_buf
+            self._buf[self._size:needed] = vectors
+            self._ids[self._size:needed] = ids
+            self._size = needed
+
+    def snapshot(self):
+        with self._lock:
+            return self.matrix, self.ids
+
+    def score_all(self, q_vec):
+        """Returns (ids, scores) for every stored vector, in insertion order."""
+        matrix, ids = self.snapshot()
+        return ids, matrix @ q_vec
+
+    def search_window(self, q_vec, start, stop):
+        ids, scores = self.score_all(q_vec)
+        positions = top_k_window(scores, start, stop)
+        return ids[positions], scores[positions]
+
+
+def spherical_kmeans(vectors, nlist, iterations=10, seed=0):
+    """Cosine k-means; returns unit-length centroids of shape (nlist, dim)."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        empty = ~sums.any(axis=1)
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        centroids = sums / norms
+    return centroids.astype(np.float32)
+
+
+class IVFEngine(ExactEngine):
+    """Inverted-file ANN index: scores only the `nprobe` nearest k-means partitions.
+
+    Below `train_threshold` vectors it behaves exactly like ExactEngine. It
+    (re)trains when the corpus first crosses the threshold and again whenever
+    it has grown `retrain_factor` times since the last training.
+
+    Searches run on request threads while CaseIndex.refresh() adds rows, so
+    the partition state (centroids, assignments, list order and bounds) is
+    built off to the side and swapped in as one unit under `_lock`. A search
+    snapshots all of it, with the matrix, under the same lock.
+    """
+
+    name = "ivf"
+
+    def __init__(self, path=None, nlist=None, nprobe=16, train_threshold=2048,
+                 retrain_factor=4, train_sample=256):
+        # Serializes add/train/_load; readers only ever take _lock.
+        self._write_lock = threading.Lock()
+        super().__init__()
+        self.path = path
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.retrain_factor = retrain_factor
+        self.train_sample = train_sample
+        if path and os.path.exists(path):
+            self._load()
+
+    def reset(self):
+        super().reset()
+        with self._lock:
+            self.centroids = None
+            self.trained_size = 0
+            self._assign = np.empty(0, dtype=np.int32)
+            self._order = None
+            self._bounds = None
+            self.fingerprint = None
+
+    def _publish(self, centroids, assign, trained_size):
+        """Builds the inverted lists for `assign`, then swaps the whole partition state in at once."""
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(centroids) + 1))
+        with self._lock:
+            self.centroids = centroids
+            self._assign = assign
+            self._order = order
+            self._bounds = bounds
+            self.trained_size = trained_size
+
+    def _load(self):
+        data = np.load(self.path)
+        with self._write_lock:
+            super().add(data["ids"], data["vectors"])
+            # Files written before fingerprints existed never match, so they are rebuilt once.
+            if "fingerprint" in data.files:
+                self.fingerprint = tuple(int(x) for x in data["fingerprint"])
+            if data["centroids"].size:
+                self._publish(data["centroids"], data["assign"], int(data["trained_size"]))
+
+    def save(self, fingerprint=None):
+        self.fingerprint = tuple(fingerprint) if fingerprint is not None else None
+        if not self.path:
+            return
+        with self._lock:
+            matrix, ids = self.matrix, self.ids
+            centroids, assign, trained_size = self.centroids, self._assign, self.trained_size
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            ids=ids,
+            vectors=matrix,
+            centroids=centroids if centroids is not None else np.empty((0, 0), dtype=np.float32),
+            assign=assign[:len(ids)],
+            trained_size=trained_size,
+            fingerprint=np.asarray(self.fingerprint or (), dtype=np.int64),
+        )
+        os.replace(tmp_path, self.path)
+
+    def train(self):
+        with self._write_lock:
+            self._train()
+
+    def _train(self):
+        matrix, _ = self.snapshot()
+        nlist = self.nlist or max(1, int(np.sqrt(len(matrix))))
+        nlist = min(nlist, len(matrix))
+        sample_size = min(len(matrix), nlist * self.train_sample)
+        rng = np.random.default_rng(0)
+        sample = matrix[rng.choice(len(matrix), sample_size, replace=False)]
+        centroids = spherical_kmeans(sample, nlist)
+        self._publish(centroids, self._nearest_centroid(matrix, centroids), len(matrix))
+
+    @staticmethod
+    def _nearest_centroid(vectors, centroids, batch=8192):
+        assign = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), batch):
+            block = vectors[start:start + batch]
+            assign[start:start + batch] = np.argmax(block @ centroids.T, axis=1)
+        return assign
+
+    def add(self, ids, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._write_lock:
+            super().add(ids, vectors)
+            size = len(self)
+            with self._lock:
+                centroids, assign, trained_size = self.centroids, self._assign, self.trained_size
+            if centroids is None:
+                if size >= self.train_threshold:
+                    self._train()
+            elif size >= trained_size * self.retrain_factor:
+                self._train()
+            else:
+                assign = np.concatenate([assign, self._nearest_centroid(vectors, centroids)])
+                self._publish(centroids, assign, trained_size)
+
+    def search_window(self, q_vec, start, stop, nprobe=None):
+        with self._lock:
+            matrix, ids = self.matrix, self.ids
+            centroids, order, bounds = self.centroids, self._order, self._bounds
+        if centroids is None:
+            return super().search_window(q_vec, start, stop)
+
+        nprobe = min(nprobe or self.nprobe, len(centroids))
+        probe = top_k_window(centroids @ q_vec, 0, nprobe)
+        candidates = np.concatenate([order[bounds[c]:bounds[c + 1]] for c in probe])
+        # Rows added after this snapshot's assignments aren't in any list yet.
+        candidates = candidates[candidates < len(ids)]
+        if len(candidates) < stop:
+            # Deep pages past what the probed lists hold fall back to a full scan.
+            return super().search_window(q_vec, start, stop)
+
+        scores = matrix[candidates] @ q_vec
+        positions = top_k_window(scores, start, stop)
+        return ids[candidates[positions]], scores[positions]
+
+
+ENGINES = {ExactEngine.name: ExactEngine, IVFEngine.name: IVFEngine}
+
+
+def make_engine(name=DEFAULT_ENGINE, db_path="users.db"):
+    """Builds an engine by name; persistent engines keep their file next to `db_path`."""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown retrieval engine {name!r}; expected one of {sorted(ENGINES)}")
+    if name == IVFEngine.name:
+        return IVFEngine(path=f"{os.path.splitext(db_path)[0]}.ivf.npz")
+    return ENGINES[name]()
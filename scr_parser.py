@@ -0,0 +1,108 @@
+"""Parses Supreme Court search-result rows (the #example_pdf table) into records.
+
+scraping.py reads a whole page of rows in one go, either the tbody's
+innerHTML from the browser or the rows of a DataTables JSON response, and
+hands it to parse_rows(). lxml parses the page once, and each row's fields
+come from that tree and a few precompiled patterns. There is no parse per
+row, and no driver round trip per row. The fields are the same ones the
+old per-row BeautifulSoup parser produced, plus the PDF URL from the
+row's open_pdf(...) handler.
+"""
+import re
+from urllib.parse import urljoin
+
+import lxml.html
+
+BASE = "https://scr.sci.gov.in"
+FIELDS = ("title", "citation", "coram", "decision_date", "case_no", "bench")
+
+DECISION_DATE = re.compile(r"Decision Date\s*[:\-]?\s*([0-9]{2}-[0-9]{2}-[0-9]{4})")
+CASE_NO = re.compile(r"Case No\s*[:\-]?\s*([^\|]+)")
+BENCH = re.compile(r"Bench\s*[:\-]?\s*([0-9]+\s*Judges|[A-Za-z0-9 ,\-&]+)")
+PDF_ARG = re.compile(r"""open_pdf\s*\((.*?)\)""", re.DOTALL)
+QUOTED = re.compile(r"""(['"])(.*?)\1""")
+
+
+def pdf_url_from_row_html(html):
+    """The PDF URL passed to the row's open_pdf(...) handler, if it names one."""
+    match = PDF_ARG.search(html)
+    if not match:
+        return None
+    for _, arg in QUOTED.findall(match.group(1)):
+        if arg.lower().split("?")[0].endswith(".pdf"):
+            return urljoin(BASE + "/", arg.lstrip("/"))
+    return None
+
+
+def _text(element, sep):
+    return sep.join(s for s in (s.strip() for s in element.itertext()) if s)
+
+
+def _parse_tr(tr):
+    title = ""
+    buttons = tr.iter("button")
+    button = next(buttons, None)
+    if button is not None:
+        title = _text(button, " ")
+    else:
+        for a in tr.iter("a"):
+            if "open_pdf" not in a.get("onclick", ""):
+                title = _text(a, " ")
+                if title:
+                    break
+
+    citation = ""
+    for span in tr.iter("span"):
+        if "escrText" in span.get("class", "").split():
+            citation = _text(span, "")
+            break
+
+    coram = ""
+    for strong in tr.iter("strong"):
+        text = _text(strong, " ")
+        if text.lower().startswith("coram"):
+            coram = text
+
+    textall = _text(tr, " ")
+    m_date = DECISION_DATE.search(textall)
+    m_case = CASE_NO.search(textall)
+    m_bench = BENCH.search(textall)
+
+    pdf_url = None
+    for onclick in tr.xpath("descendant-or-self::*/@onclick"):
+        if "open_pdf" in onclick:
+            pdf_url = pdf_url_from_row_html(onclick)
+            if pdf_url:
+                break
+
+    return {
+        "title": title,
+        "citation": citation,
+        "coram": coram,
+        "decision_date": m_date.group(1) if m_date else "",
+        "case_no": m_case.group(1).strip() if m_case else "",
+        "bench": m_bench.group(1).strip() if m_bench else "",
+        "pdf_url": pdf_url,
+    }
+
+
+def parse_rows(tbody_html):
+    """Records for every result row in `tbody_html` (a run of <tr> elements), in page order.
+
+    DataTables' "No matching records" placeholder row is skipped.
+    """
+    if not tbody_html or not tbody_html.strip():
+        return []
+    table = lxml.html.fragment_fromstring(f"<table>{tbody_html}</table>")
+    records = []
+    for tr in table.iter("tr"):
+        if any("dataTables_empty" in td.get("class", "") for td in tr.iter("td")):
+            continue
+        records.append(_parse_tr(tr))
+    return records
+
+
+def parse_row(html):
+    """Fields of a single <tr>, or None if it isn't a result row."""
+    records = parse_rows(html)
+    return records[0] if records else None
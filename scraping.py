@@ -1,12 +1,11 @@
+import argparse
 import fitz
 import time
 import re
-import random
+import threading
 from pathlib import Path
+from urllib.parse import parse_qsl, urljoin
 
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
 from tqdm import tqdm
 
 from selenium import webdriver
@@ -17,26 +16,50 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
+from crawl_state import STATE_PATH, CrawlState, csv_path_for
+from scr_parser import parse_rows
+from pdf_downloader import PdfDownloader, pooled_session
+
 BASE = "https://scr.sci.gov.in"
 SEARCH_URL = f"{BASE}/scrsearch/?p=pdf_search/home"
-OUT_CSV = "scr_search_results.csv"
+# One CSV per topic under csv/ (see crawl_state.csv_path_for).
+TOPICS = [
+    "Acid Attack", "Assault", "Culpable Homicide", "Domestic Violence", "Dowry", "Extortion", "Forgery",
+    "Kidnapping", "Money Laundering", "Murder", "Rape", "Riot", "Robbery", "Trafficking", "Trespassing",
+]
 PDF_DIR = Path("pdfs")
 PDF_DIR.mkdir(exist_ok=True)
 SHORT_DELAY = 0.6
 PAGE_LOAD_TIMEOUT = 12
-MAX_PDF_VERIFY_BYTES = 4096
+# Rows per DataTables page; fewer, longer pages mean fewer page requests.
+PAGE_LEN = 100
+# Polite limit for everything sent to the site (page loads, table draws, PDF clicks
+# and downloads), in requests per second across all workers and browsers.
+DOWNLOAD_RATE = 0.5
+DOWNLOAD_WORKERS = 4
 
 
-def init_driver():
+def init_driver(headless=False):
     opts = webdriver.ChromeOptions()
-    opts.add_argument("--start-maximized")
+    if headless:
+        opts.add_argument("--headless=new")
+        opts.add_argument("--window-size=1920,1080")
+    else:
+        opts.add_argument("--start-maximized")
     service = Service(ChromeDriverManager().install())
     driver = webdriver.Chrome(service=service, options=opts)
     driver.implicitly_wait(5)
     return driver
 
 
-def wait_for_user_to_solve(driver, query="Robbery"):
+def pace(limiter):
+    """Waits for the shared RateLimiter before the browser touches the site; None means unpaced."""
+    if limiter is not None:
+        limiter.wait()
+
+
+def wait_for_user_to_solve(driver, query="Robbery", limiter=None):
+    pace(limiter)
     driver.get(SEARCH_URL)
     time.sleep(1.0)
     try:
@@ -99,429 +122,327 @@ def extract_title_from_pdf(pdf_path):
         return None
 
 
-def extract_text_from_row_html(html):
-    """Takes the HTML of a single TR and returns a dict of its text data."""
-    soup = BeautifulSoup(html, "html.parser")
-    tr = soup
+JS_DATATABLE_READY = "return typeof jQuery !== 'undefined' && jQuery.fn.dataTable.isDataTable('#example_pdf');"
+JS_PAGE_INFO = "return $('#example_pdf').DataTable().page.info();"
+# Describes the server-side request behind #example_pdf, or null if the table is client-side.
+JS_CAPTURE_REQUEST = """
+var t = $('#example_pdf').DataTable();
+var s = t.settings()[0];
+if (!s.oFeatures.bServerSide || !s.ajax) { return null; }
+var ajax = typeof s.ajax === 'string' ? {url: s.ajax} : s.ajax;
+if (typeof ajax === 'function' || !ajax.url) { return null; }
+return {url: ajax.url, method: (ajax.type || ajax.method || 'GET').toUpperCase(),
+        params: $.param(t.ajax.params() || {}), page_url: window.location.href};
+"""
+JS_TBODY_HTML = "return document.querySelector('table#example_pdf tbody').innerHTML;"
 
-    title = ""
-    citation = ""
-    coram = ""
-    decision_date = ""
-    case_no = ""
-    bench = ""
 
-    btn = tr.find("button")
-    if btn:
-        title = " ".join(btn.stripped_strings)
-    else:
-        all_a = tr.find_all("a")
-        for a in all_a:
-            onclick = a.get("onclick", "")
-            if "open_pdf" not in onclick:
-                title = " ".join(a.stripped_strings)
-                if title:
-                    break
+def wait_for_datatable(driver):
+    WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(lambda d: d.execute_script(JS_DATATABLE_READY))
+
 
-    es = tr.find("span", class_="escrText")
-    if es:
-        citation = es.get_text(strip=True)
-    strongs = tr.find_all("strong")
-    for s in strongs:
-        txt = s.get_text(" ", strip=True)
-        if txt.lower().startswith("coram"):
-            coram = txt
-
-    textall = tr.get_text(" ", strip=True)
-    m_date = re.search(
-        r"Decision Date\s*[:\-]?\s*([0-9]{2}-[0-9]{2}-[0-9]{4})", textall
+def wait_for_draw(driver, first_row_text_before):
+    WebDriverWait(driver, PAGE_LOAD_TIMEOUT + 5).until_not(
+        EC.presence_of_element_located((By.ID, "example_pdf_processing"))
+    )
+    WebDriverWait(driver, PAGE_LOAD_TIMEOUT + 5).until(
+        lambda d: d.find_element(By.CSS_SELECTOR, "table#example_pdf tbody tr:first-child").text
+        != first_row_text_before
     )
-    if m_date:
-        decision_date = m_date.group(1)
 
-    m_case = re.search(r"Case No\s*[:\-]?\s*([^\|]+)", textall)
-    if m_case:
-        case_no = m_case.group(1).strip()
 
-    m_bench = re.search(
-        r"Bench\s*[:\-]?\s*([0-9]+\s*Judges|[A-Za-z0-9 ,\-&]+)", textall
-    )
-    if m_bench:
-        bench = m_bench.group(1).strip()
+def first_row_text(driver):
+    try:
+        return driver.find_element(By.CSS_SELECTOR, "table#example_pdf tbody tr:first-child").text
+    except Exception:
+        return ""
 
-    return {
-        "title": title,
-        "citation": citation,
-        "coram": coram,
-        "decision_date": decision_date,
-        "case_no": case_no,
-        "bench": bench,
-    }
 
+def load_results(driver, base_results_url, page_len, limiter=None):
+    """Opens the results page and sets the DataTables page length. Each request waits on `limiter`."""
+    pace(limiter)
+    driver.get(base_results_url)
+    WebDriverWait(driver, PAGE_LOAD_TIMEOUT + 5).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "table#example_pdf tbody tr"))
+    )
+    wait_for_datatable(driver)
+    if driver.execute_script("return $('#example_pdf').DataTable().page.len();") != page_len:
+        before = first_row_text(driver)
+        pace(limiter)
+        driver.execute_script(f"$('#example_pdf').DataTable().page.len({page_len}).draw('page');")
+        try:
+            wait_for_draw(driver, before)
+        except Exception:
+            # Same first row after the redraw; the page is still usable.
+            pass
 
-def verify_and_save_pdf(session, url, out_path, timeout=20):
-    """GETs the URL and writes the entire stream to out_path."""
-    try:
-        resp = session.get(url, stream=True, timeout=timeout, allow_redirects=True)
-    except Exception as e:
-        tqdm.write(f"\n[Debug] Request failed for {url}: {e}")
-        return False
 
-    if resp.status_code != 200:
-        tqdm.write(f"\n[Debug] Bad status {resp.status_code} for {url}")
+def goto_page(driver, page_index, limiter=None):
+    """Jumps straight to a 0-based page with one draw instead of clicking Next page_index times."""
+    wait_for_datatable(driver)
+    info = driver.execute_script(JS_PAGE_INFO)
+    if not info or page_index >= info["pages"]:
         return False
+    if info["page"] == page_index:
+        return True
+    before = first_row_text(driver)
+    pace(limiter)
+    driver.execute_script(f"$('#example_pdf').DataTable().page({page_index}).draw('page');")
+    wait_for_draw(driver, before)
+    return True
 
+
+def capture_datatables_request(driver):
     try:
-        with open(out_path, "wb") as f:
-            for chunk in resp.iter_content(1024 * 32):
-                if chunk:
-                    f.write(chunk)
-        return True
+        wait_for_datatable(driver)
+        return driver.execute_script(JS_CAPTURE_REQUEST)
     except Exception as e:
-        tqdm.write(f"\n[Debug] Error during file write for {out_path.name}: {e}")
-        return False
+        print(f"Could not capture the DataTables request ({e}); paging in the browser instead.")
+        return None
 
-def attempt_next_page_via_datatables(driver):
-    js = """
-    try {
-        var t = $('#example_pdf').DataTable();
-        var info = t.page.info();
-        if (info.page < info.pages - 1) {
-            t.page('next').draw('page');
-            return true;
-        } else {
-            return false;
-        }
-    } catch(e) {
-        return 'DT_ERROR';
-    }
-    """
-    try:
-        res = driver.execute_script(js)
-    except Exception:
-        res = None
-    return res
 
+def row_to_html(row):
+    """Server-side DataTables rows are arrays or objects of cell HTML."""
+    if isinstance(row, dict):
+        row = [v for k, v in row.items() if not str(k).startswith("DT_")]
+    if isinstance(row, (list, tuple)):
+        return "<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>"
+    return f"<tr><td>{row}</td></tr>"
 
-def scrape_and_download(driver, session, base_results_url):
-    all_rows_data = []
-    current_page_num = 1  
-    max_pages_to_scrape = 100  
-    rate_limit_hit = False
 
-    while current_page_num <= max_pages_to_scrape:
-        print(f"\nStarting processing for Page {current_page_num}")
+def fetch_results_page(session, request, page_index, page_len, timeout=PAGE_LOAD_TIMEOUT):
+    """Replays the captured DataTables request for one page over plain HTTP.
 
-        try:
-            print(f"Navigating to base URL...")
-            driver.get(base_results_url)
-            WebDriverWait(driver, PAGE_LOAD_TIMEOUT + 5).until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "table#example_pdf tbody tr")
-                )
-            )
-            time.sleep(1.5)  
-            if current_page_num > 1:
-                print(
-                    f"Clicking 'Next' {current_page_num - 1} times to reach page {current_page_num}..."
-                )
-                for click_count in range(current_page_num - 1):
-                    first_row_text_before = ""
-                    try:
-                        first_row_text_before = driver.find_element(
-                            By.CSS_SELECTOR, "table#example_pdf tbody tr:first-child"
-                        ).text
-                    except Exception:
-                        tqdm.write(
-                            "  Warning: Could not get first row text before click."
-                        )
-
-                    WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
-                        lambda d: d.execute_script(
-                            "return typeof jQuery !== 'undefined' && jQuery.fn.dataTable.isDataTable('#example_pdf');"
-                        )
-                    )
-                    js_next_api = """
-                    var t = $('#example_pdf').DataTable();
-                    var info = t.page.info();
-                    if (info.page < info.pages - 1) {
-                        t.page('next').draw('page'); return true;
-                    } else { return false; }
-                    """
-                    api_result = driver.execute_script(js_next_api)
-
-                    if api_result is True:
-                        tqdm.write(f"  Clicked Next (API) for page {click_count + 2}")
-                        tqdm.write("  Waiting for page content to load...")
-                        WebDriverWait(driver, PAGE_LOAD_TIMEOUT + 5).until_not(
-                            EC.presence_of_element_located(
-                                (By.ID, "example_pdf_processing")
-                            )
-                        )
-                        WebDriverWait(driver, PAGE_LOAD_TIMEOUT + 5).until(
-                            lambda d: d.find_element(
-                                By.CSS_SELECTOR,
-                                "table#example_pdf tbody tr:first-child",
-                            ).text
-                            != first_row_text_before
-                        )
-                        time.sleep(1.0) 
-                    else:
-                        tqdm.write("  API reports no next page.")
-                        rate_limit_hit = True  
-                        break
-                if rate_limit_hit:
-                    break 
-
-            print(f"Successfully on Page {current_page_num}")
-
-        except Exception as e:
-            print(
-                f"Error navigating to page {current_page_num}: {type(e).__name__} - {e}."
-            )
+    Returns (the page's rows as tbody HTML, total matching records). The
+    session carries the browser's cookies (see attach_cookies_to_session).
+    """
+    params = [(k, v) for k, v in parse_qsl(request["params"], keep_blank_values=True) if k not in ("draw", "start", "length")]
+    params += [("draw", str(page_index + 1)), ("start", str(page_index * page_len)), ("length", str(page_len))]
+    url = urljoin(request["page_url"], request["url"])
+    headers = {"X-Requested-With": "XMLHttpRequest", "Referer": request["page_url"]}
+    if request["method"] == "POST":
+        resp = session.post(url, data=params, headers=headers, timeout=timeout)
+    else:
+        resp = session.get(url, params=params, headers=headers, timeout=timeout)
+    resp.raise_for_status()
+    payload = resp.json()
+    rows = payload.get("data", payload.get("aaData", []))
+    total = payload.get("recordsFiltered", payload.get("iTotalDisplayRecords", len(rows)))
+    return "".join(row_to_html(row) for row in rows), int(total)
+
+
+def click_for_pdf_url(driver, base_results_url, page_index, row_index, page_len, limiter=None):
+    """Browser fallback: opens the page, clicks the row's PDF link and returns the URL it lands on."""
+    load_results(driver, base_results_url, page_len, limiter)
+    goto_page(driver, page_index, limiter)
+    row = driver.find_element(By.CSS_SELECTOR, f"table#example_pdf tbody tr:nth-child({row_index + 1})")
+    pdf_link_element = row.find_element(By.CSS_SELECTOR, "a[onclick*='open_pdf']")
+    driver.execute_script("arguments[0].scrollIntoView({block: 'center', inline: 'nearest'});", pdf_link_element)
+    time.sleep(0.5)
+    pace(limiter)
+    driver.execute_script("arguments[0].click();", pdf_link_element)
+    time.sleep(4.0)
+    return driver.current_url
+
+
+def on_pdf_downloaded(downloader, state, query, page_index, row_index, text_data, title_for_log, stop):
+    """Download callback: renames the PDF by the title inside it and journals the finished row."""
+
+    def callback(result):
+        status = result["status"]
+        if status == "not_pdf":
+            # Left queued in the journal, so the next run retries it.
+            tqdm.write(f"  [STOP] Rate-limit likely hit. {result['url']} returned {result['error']}")
+            stop.set()
+            return
+        if status == "failed":
+            tqdm.write(f"  [FAIL] {title_for_log}: {result['error']}")
+            state.complete_row(query, page_index, row_index, text_data, None, status="failed", error=result["error"])
+            return
+        saved_path = Path(result["path"])
+        tqdm.write(f"  [{status.upper()}] {saved_path.name}")
+        pdf_title = extract_title_from_pdf(saved_path)
+        if pdf_title:
+            text_data["title"] = pdf_title
+            new_path = saved_path.with_name(f"{pdf_title}.pdf")
+            # A duplicate's file belongs to the row that downloaded it first; leave its name alone.
+            if new_path != saved_path and status != "duplicate":
+                try:
+                    saved_path = downloader.rename(result["url"], new_path) or saved_path
+                except OSError:
+                    print("Failed to rename pdf")
+        state.complete_row(query, page_index, row_index, text_data, str(saved_path))
+
+    return callback
+
+
+def scrape_and_download(driver, session, base_results_url, downloader, state, query, page_len=PAGE_LEN,
+                        max_pages_to_scrape=100):
+    """Walks the result pages for `query` and queues each row's PDF on `downloader`.
+
+    Pages are fetched by replaying the table's server-side request over
+    HTTP when it can be captured, and otherwise by jumping to the page in
+    the browser. Each page costs one request or one draw, no longer
+    page-number Next clicks. The browser is only clicked for rows whose
+    PDF URL can't be read from their open_pdf(...) handler. Downloads run
+    on the downloader's worker pool while discovery carries on. Page
+    requests, browser navigations, table draws, PDF clicks and downloads
+    all wait on the downloader's rate limiter. Workers share it, so it caps
+    traffic to the site however many browsers run.
+
+    Every row is journalled in `state` as it is found and again when its
+    download finishes. The walk starts at state.resume_page() and skips
+    rows already finished. Returns True once the topic is complete.
+    """
+    futures = []
+    stop = threading.Event()
+    limiter = downloader.limiter
+
+    load_results(driver, base_results_url, page_len, limiter)
+    request = capture_datatables_request(driver)
+    if request:
+        print(f"Paging over HTTP: {request['method']} {request['url']}")
+    info = driver.execute_script(JS_PAGE_INFO) or {"pages": 1}
+    total_pages = min(info["pages"], max_pages_to_scrape)
+    state.set_total_pages(query, total_pages)
+    start_page = state.resume_page(query)
+    if start_page:
+        print(f"Resuming '{query}' at page {start_page + 1}/{total_pages}")
+
+    for page_index in range(start_page, total_pages):
+        current_page_num = page_index + 1
+        print(f"\nStarting processing for Page {current_page_num}/{total_pages}")
+
+        tbody_html = None
+        if request:
+            try:
+                limiter.wait()
+                tbody_html, _ = fetch_results_page(session, request, page_index, page_len)
+            except Exception as e:
+                print(f"HTTP paging failed ({type(e).__name__}: {e}); falling back to the browser.")
+                request = None
+        if tbody_html is None:
+            try:
+                load_results(driver, base_results_url, page_len, limiter)
+                if not goto_page(driver, page_index, limiter):
+                    print("Reached the last page according to DataTables.")
+                    break
+                tbody_html = driver.execute_script(JS_TBODY_HTML)
+            except Exception as e:
+                print(f"Error navigating to page {current_page_num}: {type(e).__name__} - {e}.")
+                stop.set()
+                break
+
+        records = parse_rows(tbody_html)
+        if not records:
+            print(f"No rows found on page {current_page_num}.")
             break
+        finished = state.finished_rows(query, page_index)
+        print(f"Found {len(records)} rows ({len(finished)} already done).")
 
-        try:
-            page_rows_elements = driver.find_elements(
-                By.CSS_SELECTOR, "table#example_pdf tbody tr"
-            )
-            num_rows_on_page = len(page_rows_elements)
-            if num_rows_on_page == 0:
-                print(f"No rows found on page {current_page_num}.")
+        for i, text_data in enumerate(records):
+            if stop.is_set():
                 break
-            print(f"Found {num_rows_on_page} rows.")
-        except Exception as e:
-            print(f"Error finding rows on page {current_page_num}: {e}.")
-            break
-        for i in range(num_rows_on_page):
-            verified_url = ""
-            text_data = {}
-            saved_path = ""
-            title_for_log = f"Row {i + 1}"  
+            if i in finished:
+                continue
+            title_for_log = text_data.get("title") or text_data.get("case_no") or f"Row {i + 1}"
+            tqdm.write(f"Processing (Page {current_page_num}, Row {i + 1}): {title_for_log}")
 
             try:
-                row_selector = f"table#example_pdf tbody tr:nth-child({i + 1})"
-                WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, row_selector))
-                )
-                time.sleep(0.7)
-                row = driver.find_element(By.CSS_SELECTOR, row_selector)
-                row_html = row.get_attribute("outerHTML")
-                text_data = extract_text_from_row_html(row_html)
-                title_for_log = (
-                    text_data.get("title") or text_data.get("case_no") or f"Row {i + 1}"
-                )
-                tqdm.write(
-                    f"Processing (Page {current_page_num}, Row {i + 1}): {title_for_log}"
-                )
-                pdf_link_element = row.find_element(
-                    By.CSS_SELECTOR, "a[onclick*='open_pdf']"
-                )
-                driver.execute_script(
-                    "arguments[0].scrollIntoView({block: 'center', inline: 'nearest'});",
-                    pdf_link_element,
-                )
-                time.sleep(0.5)
-                driver.execute_script("arguments[0].click();", pdf_link_element)
-                time.sleep(4.0)
-                verified_url = driver.current_url
-
-
-                if verified_url.lower().endswith(".pdf"):
-                    tqdm.write(f"  [Found URL] {verified_url}")
-                    url_to_download = verified_url.replace(
-                        "https://scr.sci.gov.in//", "https://scr.sci.gov.in/"
-                    )
-                    fname = (
-                        sanitize_filename(
-                            f"{text_data.get('decision_date') or 'nodate'}_{title_for_log}"
-                        )
-                        + ".pdf"
-                    )
-                    out_path = PDF_DIR / fname
-                    ok = verify_and_save_pdf(session, url_to_download, out_path)
-
-                    if ok:
-                        saved_path = str(out_path)
-                        tqdm.write(f"  [SAVED] {fname}")
-
-                        pdf_title = extract_title_from_pdf(out_path)
-                        if pdf_title:
-                            text_data["title"] = (
-                                pdf_title  
-                            )
-                            print(
-                                "Extracted and overwritten title from pdf: ", pdf_title
-                            )
-                            tqdm.write(f"  [Found PDF Title] {pdf_title}")
-
-                            new_path = PDF_DIR / f"{pdf_title}.pdf"
-                            try:
-                                out_path.rename(new_path)
-                                saved_path = str(new_path)
-                            except:
-                                print("Failed to rename pdf")
-
-                    else:
-                        tqdm.write(
-                            f"  [FAIL] Failed to save file from: {url_to_download}"
-                        )
-                else:
-                    tqdm.write(
-                        f"  [STOP] Rate-limit likely hit. URL was not a PDF: {verified_url}"
-                    )
-                    rate_limit_hit = True
-
-                delay = random.uniform(3.5, 5.5)
-                tqdm.write(f"  Delaying for {delay:.1f}s...")
-                time.sleep(delay)
-
-                tqdm.write(f"  Returning to base results page...")
-                driver.get(base_results_url)
-                WebDriverWait(driver, PAGE_LOAD_TIMEOUT + 5).until(
-                    EC.presence_of_element_located(
-                        (By.CSS_SELECTOR, "table#example_pdf tbody tr")
-                    )
-                )
-
-                if current_page_num > 1:
-                    tqdm.write(f"  Re-navigating to Page {current_page_num}...")
-                    for click_count in range(current_page_num - 1):
-                        first_row_text_before = ""
-                        try:
-                            first_row_text_before = driver.find_element(
-                                By.CSS_SELECTOR,
-                                "table#example_pdf tbody tr:first-child",
-                            ).text
-                        except Exception:
-                            pass
-
-                        WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
-                            lambda d: d.execute_script(
-                                "return typeof jQuery !== 'undefined' && jQuery.fn.dataTable.isDataTable('#example_pdf');"
-                            )
-                        )
-                        js_next_api = "var t = $('#example_pdf').DataTable(); var info = t.page.info(); if (info.page < info.pages - 1) { t.page('next').draw('page'); return true; } else { return false; }"
-                        api_result = driver.execute_script(js_next_api)
-
-                        if api_result is True:
-                            WebDriverWait(driver, PAGE_LOAD_TIMEOUT + 5).until_not(
-                                EC.presence_of_element_located(
-                                    (By.ID, "example_pdf_processing")
-                                )
-                            )
-                            WebDriverWait(driver, PAGE_LOAD_TIMEOUT + 5).until(
-                                lambda d: d.find_element(
-                                    By.CSS_SELECTOR,
-                                    "table#example_pdf tbody tr:first-child",
-                                ).text
-                                != first_row_text_before
-                            )
-                        else:
-                            tqdm.write(
-                                "  Error: API reports no next page during re-click."
-                            )
-                            rate_limit_hit = True
-                            break
-                    if rate_limit_hit:
-                        break  
-                WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
-                    EC.presence_of_element_located(
-                        (By.CSS_SELECTOR, "table#example_pdf tbody tr")
-                    )
-                )
-                time.sleep(1.5)  
+                verified_url = text_data.pop("pdf_url")
+                if not verified_url:
+                    # Its navigation, draws and click are spaced by the shared limiter, not a per-browser sleep.
+                    verified_url = click_for_pdf_url(driver, base_results_url, page_index, i, page_len, limiter)
+
+                if not verified_url.lower().endswith(".pdf"):
+                    tqdm.write(f"  [STOP] Rate-limit likely hit. URL was not a PDF: {verified_url}")
+                    stop.set()
+                    break
 
+                url_to_download = verified_url.replace("https://scr.sci.gov.in//", "https://scr.sci.gov.in/")
+                state.record_row(query, page_index, i, text_data, url_to_download)
+                fname = sanitize_filename(f"{text_data.get('decision_date') or 'nodate'}_{title_for_log}") + ".pdf"
+                futures.append(downloader.submit(
+                    url_to_download, PDF_DIR / fname,
+                    on_pdf_downloaded(downloader, state, query, page_index, i, text_data, title_for_log, stop),
+                    session=session,
+                ))
             except Exception as e:
                 tqdm.write(
                     f"  [ERROR] Failed to process (Page {current_page_num}, Row {i + 1}): {type(e).__name__} - {e}"
                 )
-                tqdm.write("  Attempting to recover by reloading base URL...")
-                try:
-                    driver.get(base_results_url)  
-                    WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
-                        EC.presence_of_element_located((By.ID, "example_pdf"))
-                    )
-                    tqdm.write("  Recovery successful. Continuing to next row...")
-                    continue  
-                except Exception as recovery_e:
-                    tqdm.write(f"  [CRITICAL] Recovery failed: {recovery_e}.")
-                    rate_limit_hit = True  
-
-            text_data["pdf_path_or_url"] = saved_path or verified_url
-            all_rows_data.append(text_data)
-
-            if rate_limit_hit:
-                break  
-
-        if rate_limit_hit:
+                stop.set()
+                break
+
+        if stop.is_set():
             print("Rate limit hit or error, stopping outer page loop.")
-            break  
-        try:
-            WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
-                lambda d: d.execute_script(
-                    "return typeof jQuery !== 'undefined' && jQuery.fn.dataTable.isDataTable('#example_pdf');"
-                )
-            )
-            js_page_info = "return $('#example_pdf').DataTable().page.info();"
-            info = driver.execute_script(js_page_info)
-
-            if info and info["page"] < info["pages"] - 1:
-                current_page_num += 1
-                print(
-                    f"Finished page {current_page_num - 1}. Proceeding to page {current_page_num}."
-                )
-            else:
-                print("Reached the last page according to DataTables or info is null.")
-                break  
-        except Exception as e:
-            print(f"Error getting page info to check for next page: {e}.")
             break
+        state.list_page(query, page_index, len(records))
+
+    for future in futures:
+        future.result()
+    print(f"Downloads: {downloader.stats()}")
+    return not stop.is_set() and state.resume_page(query) >= total_pages
+
+
+def crawl(topics, state, driver, session, downloader, page_len=PAGE_LEN, max_pages_to_scrape=100):
+    """Scrapes each topic in turn, skipping finished ones. Returns False if a topic had to stop early."""
+    for query in topics:
+        if state.start_topic(query, page_len) == "done":
+            print(f"'{query}' already crawled; skipping.")
+            continue
+        wait_for_user_to_solve(driver, query=query, limiter=downloader.limiter)
+        base_results_url = driver.current_url
+        print(f"Base results URL captured: {base_results_url}")
 
-    return all_rows_data
+        attach_cookies_to_session(session, get_selenium_cookies(driver))
+        session.headers.update({"Referer": base_results_url})
+        if not scrape_and_download(driver, session, base_results_url, downloader, state, query, page_len,
+                                   max_pages_to_scrape):
+            state.stop_topic(query)
+            print(f"Stopped during '{query}'; run again to resume from the journal.")
+            return False
+        rows = state.finish_topic(query)
+        print(f"Saved CSV: {csv_path_for(query)} ({rows} rows)")
+    return True
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape Supreme Court judgments for each topic, resuming from the journal")
+    parser.add_argument("topics", nargs="*", default=TOPICS)
+    parser.add_argument("--state", default=STATE_PATH, help="crawl journal (SQLite)")
+    parser.add_argument("--max-pages", type=int, default=100)
+    parser.add_argument("--retry-failed", action="store_true", help="download rows whose PDF failed last time again")
+    args = parser.parse_args()
+
+    state = CrawlState(args.state)
+    if args.retry_failed:
+        print(f"Retrying {state.retry_failed()} failed rows.")
     driver = init_driver()
-    session = requests.Session()
-    session.headers.update(
+    session = pooled_session(
+        DOWNLOAD_WORKERS,
         {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.0.0 Safari/537.36",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
             "Accept-Language": "en-US,en;q=0.9",
-        }
+        },
     )
-
-    base_results_url = None
+    downloader = PdfDownloader(PDF_DIR, session=session, workers=DOWNLOAD_WORKERS, rate=DOWNLOAD_RATE)
 
     try:
-        wait_for_user_to_solve(driver, query="Robbery")
-
-        base_results_url = driver.current_url
-        print(f"Base results URL captured: {base_results_url}")
-
-        cookies = get_selenium_cookies(driver)
-        attach_cookies_to_session(session, cookies)
-        session.headers.update({"Referer": base_results_url})  
-        scraped_data = scrape_and_download(driver, session, base_results_url)
-
-        print(f"\nAll Scraping Complete")
-        print(f"Collected {len(scraped_data)} rows from search results.")
-        if not scraped_data:
-            print("No rows found. Exiting.")
-            return
-
-        df = pd.DataFrame(scraped_data)
-        df.to_csv(OUT_CSV, index=False)
-
-        print(f"Saved CSV: {OUT_CSV}")
+        complete = crawl(args.topics, state, driver, session, downloader, max_pages_to_scrape=args.max_pages)
+        print(f"\nAll Scraping Complete" if complete else "\nScraping stopped early")
+        for topic in state.progress():
+            print(f"  {topic['query']:<24} {topic['status']:<8} done {topic['done']}  failed {topic['failed']}")
         print(f"PDF folder: {PDF_DIR.resolve()}")
     finally:
         try:
             driver.quit()
         except Exception:
             pass
+        downloader.close()
         session.close()
+        state.close()
 
 
 if __name__ == "__main__":
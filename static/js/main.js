@@ -144,9 +144,29 @@ document.addEventListener('DOMContentLoaded', () => {
     };
 
     handleAuthMod();
+    loadPendingSummaries();
 });
 
 
+function loadPendingSummaries() {
+    const resultsList = document.getElementById("results-list");
+    if (!resultsList) return;
+    const query = resultsList.dataset.query || "";
+    resultsList.querySelectorAll(".snippet[data-summary-pending]").forEach(snippet => {
+        const caseId = snippet.dataset.caseId;
+        fetch(`/case_summary/${caseId}?query=${encodeURIComponent(query)}`)
+            .then(res => res.json())
+            .then(data => {
+                if (data.summary) {
+                    snippet.textContent = data.summary;
+                }
+                delete snippet.dataset.summaryPending;
+            })
+            .catch(err => console.error("Summary fetch failed:", err));
+    });
+}
+
+
 function toggleSnippet(button) {
     const snippet = button.parentElement.querySelector('.snippet');
     if (snippet.classList.contains('hidden')) {
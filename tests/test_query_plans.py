@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+
+import migrations
+from migrations import MIGRATIONS, current_version, migrate
+from queries import RECORD_HISTORY_SQL, ROUTE_QUERIES, check_query_plans
+
+# Reads the first rows of idx_lawyers_rating in order; there is nothing to search on.
+ORDERED_INDEX_SCANS = {"/search_query top-rated lawyers"}
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(tmp_path / "users.db")
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("name", ROUTE_QUERIES)
+def test_route_query_uses_an_index(conn, name):
+    [(_, plan, ok)] = check_query_plans(conn, {name: ROUTE_QUERIES[name]})
+    steps = plan.split(" | ")
+    assert ok, plan
+    assert "TEMP B-TREE" not in plan
+    if name in ORDERED_INDEX_SCANS:
+        assert steps == ["SCAN lawyers USING INDEX idx_lawyers_rating"]
+    elif "VIRTUAL TABLE" in plan:
+        # FTS5 answers MATCH from its own index; "M" in the index string is the MATCH constraint.
+        assert all(step.startswith("SCAN cases_fts VIRTUAL TABLE INDEX") and "M" in step.split(":")[-1]
+                   for step in steps), plan
+    else:
+        assert not any(step.startswith("SCAN ") for step in steps), plan
+        assert any(step.startswith("SEARCH ") for step in steps), plan
+
+
+def test_history_upsert_probes_the_unique_index(conn):
+    [(_, plan, _)] = check_query_plans(conn, {"upsert": (RECORD_HISTORY_SQL, ("a@b.c", "dowry"))})
+    assert plan == "SEARCH CONFLICT TARGET USING INDEX idx_history_email_query"
+    conn.execute(RECORD_HISTORY_SQL, ("a@b.c", "dowry"))
+    conn.execute(RECORD_HISTORY_SQL, ("a@b.c", "dowry"))
+    assert conn.execute("SELECT count(*) FROM history").fetchone()[0] == 1
+
+
+def test_failed_migration_leaves_no_partial_schema(tmp_path, monkeypatch):
+    def broken(conn):
+        migrations.execute_script(conn, '''
+            CREATE TABLE half_done (id INTEGER PRIMARY KEY);
+            CREATE INDEX idx_missing ON no_such_table(id);
+        ''')
+
+    number = MIGRATIONS[-1][0] + 1
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS + [(number, "broken", broken)])
+    conn = sqlite3.connect(tmp_path / "users.db")
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(conn)
+    assert current_version(conn) == number - 1
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+    conn.close()
@@ -0,0 +1,42 @@
+import threading
+
+import numpy as np
+
+from retrieval import IVFEngine
+
+
+def unit_vectors(rng, n, dim=32):
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_ivf_search_during_adds_and_retrains():
+    rng = np.random.default_rng(1)
+    engine = IVFEngine(train_threshold=256, retrain_factor=2)
+    engine.add(np.arange(1, 11), unit_vectors(rng, 10))
+    query = unit_vectors(rng, 1)[0]
+    errors = []
+    done = threading.Event()
+
+    def search():
+        while not done.is_set():
+            try:
+                ids, _ = engine.search_window(query, 0, 10)
+                assert len(ids) == 10
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=search) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    next_id = 11
+    for _ in range(150):
+        n = int(rng.integers(1, 200))
+        engine.add(np.arange(next_id, next_id + n), unit_vectors(rng, n))
+        next_id += n
+    done.set()
+    for thread in threads:
+        thread.join()
+
+    assert engine.centroids is not None
+    assert not errors, errors[:3]